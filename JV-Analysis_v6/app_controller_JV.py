@@ -14,41 +14,53 @@ import os
 import io
 import base64
 import zipfile
+import tempfile
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import sys
 import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from utils_JV import save_combined_excel_data
 from resizable_plot_utility_JV import ResizablePlotManager
-import openpyxl
-from openpyxl.utils.dataframe import dataframe_to_rows
-import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 from datetime import datetime
 from diagnostic_helper_JV import debug_logger
 
 # Add parent directory for shared modules
-parent_dir = os.path.dirname(os.getcwd())
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
 # Import the new organized modules
-from gui_components_JV import AuthenticationUI, FilterUI, PlotUI, SaveUI, ColorSchemeSelector, InfoUI
+from gui_components_JV import AuthenticationUI, FilterUI, PlotUI, SaveUI, ColorSchemeSelector, InfoUI, blob_download_js
 from jv_curve_analysis_ui_NEW import EnhancedJVCurveAnalysisUI
 from font_size_ui_JV import FontSizeUI
-from data_manager_JV import DataManager
+from data_manager_JV import DataManager, FILTER_OPERATORS
 from plot_manager_JV import plotting_string_action, PlotManager
 from utils_JV import save_full_data_frame
-from batch_selection import create_batch_selection
+from batch_selection import create_batch_selection, get_batch_ids
 from error_handler import ErrorHandler
 
 # Import shared modules
 try:
-    from api_calls import get_all_measurements_except_JV, get_ids_in_batch
+    from api_calls import get_all_measurements_except_JV, get_ids_in_batch, response_json
 except ImportError:
     print("Warning: Some API modules not available")
 
 
+# Fallback palette used when no color selector is available
+_DEFAULT_COLORS = (
+    'rgba(93, 164, 214, 0.7)', 'rgba(255, 144, 14, 0.7)',
+    'rgba(44, 160, 101, 0.7)', 'rgba(255, 65, 54, 0.7)',
+    'rgba(207, 114, 255, 0.7)', 'rgba(127, 96, 0, 0.7)',
+    'rgba(255, 140, 184, 0.7)', 'rgba(79, 90, 117, 0.7)',
+)
+
+
 # ── PptxGenJS library loader ──────────────────────────────────────────────────
 # The library is downloaded ONCE from the CDN by the Python server and cached
 # locally.  On every PPTX button-click it is injected inline into the page so
@@ -94,9 +106,26 @@ def _load_pptxgenjs():
 # ─────────────────────────────────────────────────────────────────────────────
 
 
+class _TimeoutSession(requests.Session):
+    """requests.Session that applies a default (connect, read) timeout to every call"""
+    
+    def __init__(self, timeout):
+        super().__init__()
+        self.default_timeout = timeout
+    
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.default_timeout
+        return super().request(method, url, **kwargs)
+
+
 class SimpleAuthManager:
     """Simplified authentication manager"""
     
+    # (connect, read) timeouts; archive queries can be large, auth calls are not
+    API_TIMEOUT = (3.05, 60)
+    AUTH_TIMEOUT = (3, 10)
+    
     def __init__(self, base_url, api_endpoint):
         self.base_url = base_url
         self.api_endpoint = api_endpoint
@@ -104,7 +133,22 @@ class SimpleAuthManager:
         self.current_token = None
         self.current_user_info = None
         self.status_callback = None
+        self.token_callback = None  # called with the new token before it is verified
         self.api_client = self  # Compatibility
+        self._http = None
+
+    @property
+    def http(self):
+        """Shared requests session so all API calls reuse pooled keep-alive connections"""
+        if self._http is None:
+            session = _TimeoutSession(self.API_TIMEOUT)
+            retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                            allowed_methods=frozenset(['GET', 'POST']))
+            adapter = HTTPAdapter(max_retries=retries, pool_connections=4, pool_maxsize=16)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._http = session
+        return self._http
     
     def set_status_callback(self, callback):
         self.status_callback = callback
@@ -113,6 +157,12 @@ class SimpleAuthManager:
         if self.status_callback:
             self.status_callback(message, color)
     
+    def _set_token(self, token):
+        self.current_token = token
+        self.http.headers.update({'Authorization': f'Bearer {token}'})
+        if self.token_callback:
+            self.token_callback(token)
+    
     def authenticate_with_credentials(self, username, password):
         if not username or not password:
             raise ValueError("Username and Password are required.")
@@ -120,14 +170,14 @@ class SimpleAuthManager:
         auth_dict = dict(username=username, password=password)
         token_url = f"{self.url}/auth/token"
         
-        response = requests.get(token_url, params=auth_dict, timeout=10)
+        response = self.http.get(token_url, params=auth_dict, timeout=self.AUTH_TIMEOUT)
         response.raise_for_status()
         
-        token_data = response.json()
+        token_data = response_json(response)
         if 'access_token' not in token_data:
             raise ValueError("Access token not found in response.")
         
-        self.current_token = token_data['access_token']
+        self._set_token(token_data['access_token'])
         return self.current_token
     
     def authenticate_with_token(self, token=None):
@@ -136,21 +186,30 @@ class SimpleAuthManager:
             if not token:
                 raise ValueError("Token not found in environment variable.")
         
-        self.current_token = token
+        self._set_token(token)
         return self.current_token
     
-    def verify_token(self):
-        if not self.current_token:
+    def verify_token(self, token=None, report=True):
+        """Verify a token (default: the current one) and get user info.
+        
+        With report=False only the request is made and current_user_info is
+        left alone, so the call is safe from a worker thread.
+        """
+        if token is None:
+            token = self.current_token
+        if not token:
             raise ValueError("No token available for verification.")
         
         verify_url = f"{self.url}/users/me"
-        headers = {'Authorization': f'Bearer {self.current_token}'}
+        headers = {'Authorization': f'Bearer {token}'}
         
-        verify_response = requests.get(verify_url, headers=headers, timeout=10)
+        verify_response = self.http.get(verify_url, headers=headers, timeout=self.AUTH_TIMEOUT)
         verify_response.raise_for_status()
         
-        self.current_user_info = verify_response.json()
-        return self.current_user_info
+        user_info = response_json(verify_response)
+        if report:
+            self.current_user_info = user_info
+        return user_info
     
     def is_authenticated(self):
         return self.current_token is not None and self.current_user_info is not None
@@ -158,6 +217,8 @@ class SimpleAuthManager:
     def clear_authentication(self):
         self.current_token = None
         self.current_user_info = None
+        if self._http is not None:
+            self._http.headers.pop('Authorization', None)
     
     def get_user_display_name(self):
         if not self.current_user_info:
@@ -178,6 +239,13 @@ class JVAnalysisApp:
         self.global_plot_data = {'figs': [], 'names': [], 'workbook': None}
         self.selected_batch_ids = []
         
+        # Background pool for I/O-bound API calls (other measurements fetch)
+        self._io_pool = ThreadPoolExecutor(max_workers=4)
+        self._measurements_future = None
+        self._batch_ids_future = None
+        self._batch_cache = {}  # sha1(url + token) -> (monotonic timestamp, batch ids)
+        self.auth_manager.token_callback = self._prefetch_batch_ids
+        
         # Initialize UI components
         self._init_ui_components()
         self._create_tabs()
@@ -413,6 +481,34 @@ class JVAnalysisApp:
         self.tabs.selected_index = 0
         self._init_batch_selection()
     
+    # Boxplot grouping labels that differ from their DataFrame column
+    GROUPING_COLUMNS = {'Variable': 'condition', 'Scan Direction': 'direction'}
+    
+    BATCH_CACHE_TTL = 300  # seconds
+    
+    def _batch_cache_key(self, token):
+        return hashlib.sha1(f"{self.auth_manager.url}|{token}".encode()).digest()
+    
+    def _get_cached_batch_ids(self, token):
+        """Return the cached batch list for this token if it is younger than the TTL"""
+        entry = self._batch_cache.get(self._batch_cache_key(token))
+        if entry and time.monotonic() - entry[0] < self.BATCH_CACHE_TTL:
+            return entry[1]
+        return None
+    
+    def _store_batch_ids(self, token, batch_ids):
+        # Only the current token's catalog is kept
+        self._batch_cache = {self._batch_cache_key(token): (time.monotonic(), list(batch_ids))}
+    
+    def _prefetch_batch_ids(self, token):
+        """Start loading the batch list as soon as a token exists, overlapping /users/me"""
+        if self._get_cached_batch_ids(token) is not None:
+            self._batch_ids_future = None
+            return
+        self._batch_ids_future = self._io_pool.submit(
+            get_batch_ids, self.auth_manager.url, token, session=self.auth_manager.http
+        )
+    
     def _init_batch_selection(self):
         """Initialize batch selection after authentication"""
         with self.batch_selection_container:
@@ -426,7 +522,17 @@ class JVAnalysisApp:
                 url = self.auth_manager.url
                 token = self.auth_manager.current_token
                 #print("📊 Initializing batch selection...")
-                batch_selection_widget = create_batch_selection(url, token, self._load_data_from_selection)
+                batch_ids = self._get_cached_batch_ids(token)
+                if batch_ids is None:
+                    if self._batch_ids_future is not None:
+                        batch_ids = self._batch_ids_future.result()
+                        self._batch_ids_future = None
+                    else:
+                        batch_ids = get_batch_ids(url, token, session=self.auth_manager.http)
+                    self._store_batch_ids(token, batch_ids)
+                batch_selection_widget = create_batch_selection(url, token, self._load_data_from_selection,
+                                                                session=self.auth_manager.http,
+                                                                batch_ids=batch_ids)
                 display(batch_selection_widget)
             except requests.exceptions.RequestException as e:
                 # Network/server error - show detailed message
@@ -456,47 +562,50 @@ class JVAnalysisApp:
             data = self.data_manager.get_data()
             
             # CRITICAL: Show cycle information in LOAD STATUS OUTPUT
-            with self.load_status_output:
-                print(f"\n{'='*60}")
-                print(f"📊 CYCLE DETECTION RESULTS:")
-                print(f"{'='*60}")
-                
-                if self.data_manager.has_cycle_data:
-                    print(f"✅ Cycle data FOUND!")
-                    print(f"   • Sample-pixel combinations with cycles: {len(self.data_manager.cycle_info)}")
-                    
-                    # Show statistics
-                    if 'cycle_number' in data['jvc'].columns:
-                        cycle_df = data['jvc'][data['jvc']['cycle_number'].notna()]
-                        if not cycle_df.empty:
-                            num_cycles = cycle_df['cycle_number'].nunique()
-                            total_with_cycles = len(cycle_df)
-                            print(f"   • Total measurements with cycle info: {total_with_cycles}")
-                            print(f"   • Unique cycle numbers found: {sorted(cycle_df['cycle_number'].unique().tolist())}")
-                            
-                            # Show examples
-                            print(f"\n   Example measurements:")
-                            for _, row in cycle_df.head(3).iterrows():
-                                print(f"      - {row['sample']} / {row['px_number']} / Cycle {int(row['cycle_number'])} / PCE: {row['PCE(%)']:.2f}%")
-                else:
-                    print(f"ℹ️  NO cycle data detected in this dataset")
-                    print(f"   • This is normal for datasets without cycle measurements")
-                    print(f"   • Cycle filter will be hidden in Filter tab")
+            # (collected first and printed once: every print is a separate Output message)
+            lines = [f"\n{'='*60}", "📊 CYCLE DETECTION RESULTS:", f"{'='*60}"]
+            
+            if self.data_manager.has_cycle_data:
+                lines.append("✅ Cycle data FOUND!")
+                lines.append(f"   • Sample-pixel combinations with cycles: {len(self.data_manager.cycle_info)}")
                 
-                print(f"{'='*60}\n")
+                # Show statistics
+                if 'cycle_number' in data['jvc'].columns:
+                    cycle_df = data['jvc'][data['jvc']['cycle_number'].notna()]
+                    if not cycle_df.empty:
+                        cycle_numbers = sorted(cycle_df['cycle_number'].unique().tolist())
+                        lines.append(f"   • Total measurements with cycle info: {len(cycle_df)}")
+                        lines.append(f"   • Unique cycle numbers found: {cycle_numbers}")
+                        
+                        # Show examples
+                        lines.append("\n   Example measurements:")
+                        examples = cycle_df.head(3)[['sample', 'px_number', 'cycle_number', 'PCE(%)']]
+                        for sample, px_number, cycle_number, pce in examples.itertuples(index=False, name=None):
+                            lines.append(f"      - {sample} / {px_number} / Cycle {int(cycle_number)} / PCE: {pce:.2f}%")
+            else:
+                lines.append("ℹ️  NO cycle data detected in this dataset")
+                lines.append("   • This is normal for datasets without cycle measurements")
+                lines.append("   • Cycle filter will be hidden in Filter tab")
+            
+            lines.append(f"{'='*60}\n")
+            
+            # General data summary
+            jvc = data['jvc']
+            unique_counts = jvc[['sample', 'batch']].nunique()
+            lines.extend([
+                "\n📈 Data Loading Summary:",
+                f"   Total records loaded: {len(jvc)}",
+                f"   Unique samples: {unique_counts['sample']}",
+                f"   Unique cells: {jvc.groupby('sample', sort=False)['cell'].nunique().sum()}",
+                f"   Batches: {unique_counts['batch']}",
+                "\n✅ Data ready for variable assignment and filtering!",
+            ])
+            with self.load_status_output:
+                print("\n".join(lines))
             
             # Set data for FilterUI
             self.filter_ui.set_sample_data(data)
             self.jv_curve_analysis_ui.set_data(data)
-            
-            # Show general data summary
-            with self.load_status_output:
-                print(f"\n📈 Data Loading Summary:")
-                print(f"   Total records loaded: {len(data['jvc'])}")
-                print(f"   Unique samples: {data['jvc']['sample'].nunique()}")
-                print(f"   Unique cells: {data['jvc'].groupby('sample')['cell'].nunique().sum()}")
-                print(f"   Batches: {data['jvc']['batch'].nunique()}")
-                print(f"\n✅ Data ready for variable assignment and filtering!")
 
             with self.download_zip_output:
                 clear_output(wait=True)
@@ -525,6 +634,7 @@ If you tested specific variables or conditions for each sample, please write the
             display(self.default_variables)
             
             widgets_table, text_widgets_dict = self._create_widgets_table(unique_vals)
+            self._text_widgets = text_widgets_dict
             retrieve_button = widgets.Button(
                 description="Confirm variables",
                 button_style='success',
@@ -560,16 +670,8 @@ If you tested specific variables or conditions for each sample, please write the
         text_widgets = {}
         
         for item in elements_list:
-            item_split = item.split("&")
-            batch, variable = "", item
-            if len(item_split) >= 2:
-                batch, variable = item_split[0], "&".join(item_split[1:])
-            
-            default_value = ""
-            if self.default_variables.value == "Batch name":
-                default_value = batch if batch else "_".join(item.split("_")[:-1])
-            elif self.default_variables.value == "Variation":
-                default_value = variable
+            batch, variable = self._split_identifier(item)
+            default_value = self._default_variable_value(item)
             
             label = widgets.Label(value=variable)
             text_input = widgets.Text(value=default_value, placeholder='Variable e.g. 1000 rpm')
@@ -589,29 +691,28 @@ If you tested specific variables or conditions for each sample, please write the
         # Create conditions_dict from the text widget values
         data = self.data_manager.get_data()
         if data and 'jvc' in data:
+            # Start fetching other measurements now so the requests overlap with the UI updates below
+            self._measurements_future = self._io_pool.submit(
+                self._fetch_measurements, self.data_manager.get_loaded_batch_ids()
+            )
+
             conditions_dict = {}
             
             # For each unique identifier, get the user's input for the condition
             for identifier in data['jvc']['identifier'].unique():
-                if identifier in text_widgets_dict:
+                text_input = text_widgets_dict.get(identifier)
+                user_condition = text_input.value.strip() if text_input is not None else ""
+                if user_condition:
                     # Use the user's input from the text widget
-                    user_condition = text_widgets_dict[identifier].value.strip()
-                    if user_condition:
-                        conditions_dict[identifier] = user_condition
-                    else:
-                        # Fallback to variation from identifier if user didn't enter anything
-                        if identifier and '&' in str(identifier):
-                            variation = str(identifier).split('&', 1)[1]
-                            conditions_dict[identifier] = variation
-                        else:
-                            conditions_dict[identifier] = "Unknown"
+                    conditions_dict[identifier] = user_condition
+                    continue
+                
+                # Fallback to the variation part of the identifier
+                batch, variation = self.data_manager.get_identifier_parts(identifier)
+                if identifier and batch is not None:
+                    conditions_dict[identifier] = variation
                 else:
-                    # Fallback for identifiers not in text_widgets_dict
-                    if identifier and '&' in str(identifier):
-                        variation = str(identifier).split('&', 1)[1]
-                        conditions_dict[identifier] = variation
-                    else:
-                        conditions_dict[identifier] = "Unknown"
+                    conditions_dict[identifier] = "Unknown"
         
         # Apply the conditions
         success = self.data_manager.apply_conditions(conditions_dict)
@@ -643,8 +744,33 @@ If you tested specific variables or conditions for each sample, please write the
                 clear_output()
                 print("❌ Error loading variables")
     
+    def _split_identifier(self, item):
+        """Split a 'batch&variation' identifier into (batch, variation) using the DataManager cache"""
+        batch, variable = self.data_manager.get_identifier_parts(item)
+        return batch or "", variable
+    
+    def _default_variable_value(self, item):
+        """Default text for a variable input according to the 'Defaults' dropdown"""
+        batch, variable = self._split_identifier(item)
+        if self.default_variables.value == "Batch name":
+            return batch if batch else "_".join(item.split("_")[:-1])
+        elif self.default_variables.value == "Variation":
+            return variable
+        return ""
+    
     def _on_change_default_variables(self, change):
         """Handle default variables change"""
+        if change.get('new') == change.get('old'):
+            return
+        
+        # Update the existing text inputs in place instead of rebuilding the whole menu
+        text_widgets = getattr(self, '_text_widgets', None)
+        unique_vals = self.data_manager.get_unique_values()
+        if text_widgets and set(text_widgets) == set(unique_vals):
+            for item, text_input in text_widgets.items():
+                text_input.value = self._default_variable_value(item)
+            return
+        
         self._make_variables_menu()
     
     def _on_font_size_change(self, axis_size, title_size, legend_size, jv_line_width=None):
@@ -654,12 +780,18 @@ If you tested specific variables or conditions for each sample, please write the
         # via plotting_string_action.
         pass
     
+    @staticmethod
+    def _to_csv_bytes(df):
+        """Write a DataFrame as UTF-8 CSV straight into a bytes buffer"""
+        buffer = io.BytesIO()
+        df.to_csv(buffer, index=False, encoding='utf-8', chunksize=50000)
+        return buffer.getvalue()
+    
     def _download_jv_data(self, e=None):
         """Download JV data as CSV"""
         jvc_data, _ = self.data_manager.get_export_data()
         if jvc_data is not None:
-            jvc_csv = jvc_data.to_csv(index=False)
-            self.save_ui.trigger_download(jvc_csv, 'export_jvc.csv', 'text/plain')
+            self.save_ui.trigger_download(self._to_csv_bytes(jvc_data), 'export_jvc.csv', 'text/csv')
         else:
             print("No JV data available for download")
     
@@ -667,11 +799,18 @@ If you tested specific variables or conditions for each sample, please write the
         """Download curves data as CSV"""
         _, curves_data = self.data_manager.get_export_data()
         if curves_data is not None:
-            curves_csv = curves_data.to_csv(index=False)
-            self.save_ui.trigger_download(curves_csv, 'export_curves.csv', 'text/plain')
+            self.save_ui.trigger_download(self._to_csv_bytes(curves_data), 'export_curves.csv', 'text/csv')
         else:
             print("No curves data available for download")
     
+    def _fetch_measurements(self, batch_ids_value):
+        """Fetch all non-JV measurements for the given batches (runs in the I/O pool)"""
+        url = self.auth_manager.url
+        token = self.auth_manager.current_token
+        session = self.auth_manager.http
+        sample_ids = get_ids_in_batch(url, token, batch_ids_value, session=session)
+        return get_all_measurements_except_JV(url, token, sample_ids, session=session)
+    
     def _show_measurements_table(self):
         """Show other measurements table"""
         try:
@@ -683,38 +822,39 @@ If you tested specific variables or conditions for each sample, please write the
                 clear_output(wait=True)
                 print("Loading measurements data...")
                 
-                batch_ids_value = list(data['jvc']['batch'].unique())
+                batch_ids_value = self.data_manager.get_loaded_batch_ids()
                 if not batch_ids_value:
                     print("No batch IDs found in loaded data.")
                     return
                 
-                url = self.auth_manager.url
-                token = self.auth_manager.current_token
-                
                 try:
-                    # Import necessary functions
-                    from api_calls import get_ids_in_batch, get_all_measurements_except_JV
-                    sample_ids = get_ids_in_batch(url, token, batch_ids_value)
-                    measurements_data = get_all_measurements_except_JV(url, token, sample_ids)
+                    # Reuse the prefetch started in _on_retrieve_clicked when available
+                    future = self._measurements_future
+                    self._measurements_future = None
+                    if future is None:
+                        future = self._io_pool.submit(self._fetch_measurements, batch_ids_value)
+                    measurements_data = future.result()
                     
-                    import pandas as pd
-                    df = pd.DataFrame()
+                    entry_url = f"{self.auth_manager.base_url}/nomad-oasis/gui/entry/id"
                     
                     def make_clickable(r):
-                        base_url = self.auth_manager.base_url
-                        if "SEM" in r[1]["entry_type"]:
-                            return f'<a href="{base_url}/nomad-oasis/gui/entry/id/{r[1]["entry_id"]}/data/data/images:0/image_preview/preview" rel="noopener noreferrer" target="_blank">{r[1]["entry_type"].split("_")[-1]}</a>'
-                        return f'<a href="{base_url}/nomad-oasis/gui/entry/id/{r[1]["entry_id"]}/data/data" rel="noopener noreferrer" target="_blank">{r[1]["entry_type"].split("_")[-1]}</a>'
+                        entry_type = r[1]["entry_type"]
+                        label = entry_type.rsplit("_", 1)[-1]
+                        if "SEM" in entry_type:
+                            return f'<a href="{entry_url}/{r[1]["entry_id"]}/data/data/images:0/image_preview/preview" rel="noopener noreferrer" target="_blank">{label}</a>'
+                        return f'<a href="{entry_url}/{r[1]["entry_id"]}/data/data" rel="noopener noreferrer" target="_blank">{label}</a>'
                     
-                    for key, value in measurements_data.items():
-                        if value:
-                            df[key] = pd.Series([make_clickable(r) for r in value])
+                    # Build all columns first, then create the DataFrame in one go
+                    columns = {key: pd.Series([make_clickable(r) for r in value])
+                               for key, value in measurements_data.items() if value}
+                    df = pd.DataFrame(columns)
                     
                     if df.empty:
                         print("No additional measurements found.")
                     else:
                         display(widgets.HTML("<h3>Additional Measurements</h3>"))
-                        display(widgets.HTML(df.to_html(escape=False)))
+                        # Cells are already HTML links; empty cells render blank instead of NaN
+                        display(widgets.HTML(df.to_html(escape=False, index=False, na_rep='', border=0)))
                 
                 except AssertionError:
                     print("No additional measurements found for the selected batches.")
@@ -731,19 +871,19 @@ If you tested specific variables or conditions for each sample, please write the
             filtered_df: Filtered DataFrame
             
         Returns:
-            Number of unique conditions (clamped to 2-20)
+            Number of unique conditions or statuses, whichever is larger (clamped to 2-20)
         """
         if filtered_df is None or filtered_df.empty:
-            return 8  # Default fallback
-        
-        # Count unique conditions (the main grouping variable)
-        if 'condition' in filtered_df.columns:
-            num_conditions = filtered_df['condition'].nunique()
-        elif 'sample' in filtered_df.columns:
-            # Fallback to samples if conditions not assigned
-            num_conditions = filtered_df['sample'].nunique()
+            return self.color_selector.num_colors  # Keep the current palette size
+        
+        # Count unique conditions (the main grouping variable; samples if conditions
+        # are not assigned) and statuses in one pass, and size the palette to the larger
+        group_col = 'condition' if 'condition' in filtered_df.columns else 'sample'
+        count_cols = [c for c in (group_col, 'status') if c in filtered_df.columns]
+        if count_cols:
+            num_conditions = int(filtered_df[count_cols].nunique().max())
         else:
-            num_conditions = 8  # Default
+            num_conditions = self.color_selector.num_colors
         
         # Clamp to reasonable bounds (min 2, max 20)
         num_conditions = max(2, min(20, num_conditions))
@@ -767,19 +907,22 @@ If you tested specific variables or conditions for each sample, please write the
         with self.filter_ui.main_output:
             clear_output(wait=True)
             
-            print(f"{'='*70}")
-            print(f"🔧 FILTER APPLICATION")
-            print(f"{'='*70}")
-            print(f"Direction filter: {direction_value}")
-            print(f"Cycle filter mode: {cycle_settings.get('mode', 'disabled')}")  # CHANGED
+            header = [
+                f"{'='*70}",
+                "🔧 FILTER APPLICATION",
+                f"{'='*70}",
+                f"Direction filter: {direction_value}",
+                f"Cycle filter mode: {cycle_settings.get('mode', 'disabled')}",
+            ]
             if cycle_settings.get('mode') == 'specific':
-                print(f"   Selected cycles: {cycle_settings.get('cycles', [])}")
-            print(f"Sample selection active: {selected_items is not None}")
-            print(f"Numeric filters: {len(filter_values)}")
-            print(f"{'='*70}\n")
+                header.append(f"   Selected cycles: {cycle_settings.get('cycles', [])}")
+            header.append(f"Sample selection active: {selected_items is not None}")
+            header.append(f"Numeric filters: {len(filter_values)}")
+            header.append(f"{'='*70}\n")
+            print("\n".join(header))
             
             try:
-                working_data = data["jvc"].copy()
+                working_data = data["jvc"]
                 original_count = len(working_data) if working_data is not None else 0
                 
                 # STEP 1: Apply cycle filter based on mode
@@ -813,32 +956,28 @@ If you tested specific variables or conditions for each sample, please write the
                 # STEP 2: Apply standard filters
                 print(f"🔍 Step 2: Applying standard filters...")
                 
-                # Temporarily replace data
-                original_jvc = data["jvc"]
-                data["jvc"] = working_data
-                
                 filtered_df, omitted_df, filter_params = self.data_manager.apply_filters(
-                    filter_values, direction_value, selected_items, verbose=True
+                    filter_values, direction_value, selected_items, verbose=True, df=working_data
                 )
                 
-                # Restore
-                data["jvc"] = original_jvc
-                
                 # STEP 3: Show summary
                 final_count = len(filtered_df) if filtered_df is not None else 0
                 
-                print(f"\n{'='*70}")
-                print(f"📊 FILTERING SUMMARY:")
-                print(f"{'='*70}")
-                print(f"Original dataset:        {original_count:>6} records")
+                summary = [
+                    f"\n{'='*70}",
+                    "📊 FILTERING SUMMARY:",
+                    f"{'='*70}",
+                    f"Original dataset:        {original_count:>6} records",
+                ]
                 
                 if cycle_settings['mode'] in ['best_only', 'specific'] and self.data_manager.has_cycle_data:
                     cycle_removed = original_count - after_cycle_count
-                    print(f"After cycle filter:      {after_cycle_count:>6} records ({cycle_removed} removed)")
+                    summary.append(f"After cycle filter:      {after_cycle_count:>6} records ({cycle_removed} removed)")
                 
-                print(f"After all filters:       {final_count:>6} records")
-                print(f"Retention rate:          {(final_count/original_count)*100:>5.1f}%")
-                print(f"{'='*70}")
+                summary.append(f"After all filters:       {final_count:>6} records")
+                summary.append(f"Retention rate:          {(final_count/original_count)*100:>5.1f}%")
+                summary.append(f"{'='*70}")
+                print("\n".join(summary))
                 
                 if final_count > 0:
                     print(f"\n✅ Filtering complete! Proceed to plotting tab.")
@@ -856,13 +995,13 @@ If you tested specific variables or conditions for each sample, please write the
                         
                         if 'identifier' in filtered_df.columns:
                             # Preserve the original upload order (same as "Add Variable Names" page)
-                            original_order = list(self.data_manager.get_unique_values())
-                            present_ids = set(filtered_df['identifier'].unique())
+                            original_order = self.data_manager.get_unique_values()
+                            filtered_ids = filtered_df['identifier'].unique()
+                            present_ids = set(filtered_ids)
                             available_vars = [v for v in original_order if v in present_ids]
                             # Safety: add any identifiers present in filtered data but missing from unique_vals
-                            for v in filtered_df['identifier'].unique():
-                                if v not in present_ids or v not in set(available_vars):
-                                    available_vars.append(v)
+                            listed = set(available_vars)
+                            available_vars.extend(v for v in filtered_ids if v not in listed)
                             debug_logger.add('PLOT', f"Using 'identifier' column (upload order preserved), found {len(available_vars)} unique values")
                         elif 'condition' in filtered_df.columns:
                             available_vars = list(filtered_df['condition'].unique())
@@ -919,6 +1058,7 @@ If you tested specific variables or conditions for each sample, please write the
         
         plot_selections = self.plot_ui.get_plot_selections()
 
+        # ColorSchemeSelector memoizes palettes and returns a fresh list per call
         sampling_method = self.color_selector.sampling_dropdown.value
         selected_colors = self.color_selector.get_colors(
             num_colors=self.color_selector.num_colors,
@@ -950,16 +1090,6 @@ If you tested specific variables or conditions for each sample, please write the
             debug_logger.add('PLOT', f"Variable order from UI: {variable_order}")
             debug_logger.add('PLOT', f"Variable order is empty: {not variable_order or len(variable_order) == 0}")
             
-            # Create workbook for Excel export with proper analysis sheets
-            wb = openpyxl.Workbook()
-            if wb.active is not None:
-                wb.remove(wb.active)  # Remove default sheet
-            
-            # Add main data sheet first
-            main_sheet = wb.create_sheet(title='All_data')
-            for r in dataframe_to_rows(filtered_data, index=True, header=True):
-                main_sheet.append(r)
-            
             # CRITICAL FIX: Prepare data structures for plotting
             # Extract filtered data components
             filtered_jv = data.get('filtered')
@@ -990,8 +1120,9 @@ If you tested specific variables or conditions for each sample, please write the
                     debug_logger.add('PLOT', f"[ORDER] Requested order: {variable_order}")
                     
                     # Check if all requested categories exist in data
-                    missing_categories = [cat for cat in variable_order if cat not in unique_before]
-                    extra_categories = [cat for cat in unique_before if cat not in variable_order]
+                    unique_before_set, variable_order_set = set(unique_before), set(variable_order)
+                    missing_categories = [cat for cat in variable_order if cat not in unique_before_set]
+                    extra_categories = [cat for cat in unique_before if cat not in variable_order_set]
                     if missing_categories:
                         debug_logger.add('PLOT', f"[ORDER] WARNING: Missing categories in data: {missing_categories}")
                     if extra_categories:
@@ -1075,12 +1206,23 @@ If you tested specific variables or conditions for each sample, please write the
             )
             
             # CRITICAL FIX: Initialize lists and generate titles/subtitles
-            titles = []
-            subtitles = []
+            titles = [None] * len(figs)
+            subtitles = [None] * len(figs)
             
             # Match each figure with its plot selection
             selection_idx = 0  # Track which plot selection we're processing
             
+            # Shared title inputs, computed once for all figures
+            filtered_df = data.get('filtered')
+            num_measurements = len(filtered_df) if filtered_df is not None else 0
+            filtered_cols = set(filtered_df.columns) if filtered_df is not None else set()
+            nunique_cache = {}
+            best_device_label = None  # resolved on first 'Best device only' figure
+            direction_note = " (Separated by Scan Direction)" if separate_scan_dir else ""
+            datatype_suffix = " (filtered data)"
+            grouping_displays = [(opt2.replace('by ', '') if opt2 else 'Unknown') for _, _, opt2 in plot_selections]
+            grouping_cols = [self.GROUPING_COLUMNS.get(label, label) for label in grouping_displays]
+            
             for i, fig in enumerate(figs):
                 # Find corresponding plot selection (skip combination plots that generate multiple figures)
                 if selection_idx < len(plot_selections):
@@ -1088,49 +1230,26 @@ If you tested specific variables or conditions for each sample, please write the
                     
                     if plot_type == 'Boxplot':
                         # Generate title and subtitle for boxplot
-                        direction_note = " (Separated by Scan Direction)" if separate_scan_dir else ""
-                        datatype = "data"
+                        grouping_display = grouping_displays[selection_idx]
+                        grouping_col = grouping_cols[selection_idx]
                         
                         # CRITICAL FIX: Handle 'all' option where option1='all' and option2 contains the x-axis variable
                         if option1 == 'all':
                             # Combined grid boxplot: all 4 parameters in one grid
-                            grouping_display = option2.replace('by ', '') if option2 else 'Unknown'
-                            title = f"Combined Boxplots (PCE, FF, Jsc, Voc) by {grouping_display}{direction_note}"
-                            title += " (filtered out)" if datatype == "junk" else " (filtered data)"
-                            
-                            filtered_df = data.get('filtered')
-                            num_measurements = len(filtered_df) if filtered_df is not None else 0
-                            
-                            # Handle different grouping columns
-                            grouping_col = grouping_display
-                            if grouping_col == 'Variable':
-                                grouping_col = 'condition'
-                            elif grouping_col == 'Scan Direction':
-                                grouping_col = 'direction'
-                            
-                            num_categories = filtered_df[grouping_col].nunique() if filtered_df is not None and grouping_col in filtered_df.columns else 0
-                            subtitle = f"Data from {num_measurements} measurements across {num_categories} categories"
+                            title = f"Combined Boxplots (PCE, FF, Jsc, Voc) by {grouping_display}{direction_note}{datatype_suffix}"
                         else:
                             # Regular single-parameter boxplot
-                            grouping_display = option2.replace('by ', '') if option2 else 'Unknown'
-                            title = f"Boxplot of {option1} by {grouping_display}{direction_note}"
-                            title += " (filtered out)" if datatype == "junk" else " (filtered data)"
-                            
-                            filtered_df = data.get('filtered')
-                            num_measurements = len(filtered_df) if filtered_df is not None else 0
-                            
-                            # Handle different grouping columns
-                            grouping_col = grouping_display
-                            if grouping_col == 'Variable':
-                                grouping_col = 'condition'
-                            elif grouping_col == 'Scan Direction':
-                                grouping_col = 'direction'
-                            
-                            num_categories = filtered_df[grouping_col].nunique() if filtered_df is not None and grouping_col in filtered_df.columns else 0
-                            subtitle = f"Data from {num_measurements} measurements across {num_categories} categories"
+                            title = f"Boxplot of {option1} by {grouping_display}{direction_note}{datatype_suffix}"
+                        
+                        if grouping_col not in nunique_cache:
+                            nunique_cache[grouping_col] = (
+                                filtered_df[grouping_col].nunique() if grouping_col in filtered_cols else 0
+                            )
+                        num_categories = nunique_cache[grouping_col]
+                        subtitle = f"Data from {num_measurements} measurements across {num_categories} categories"
                         
-                        titles.append(title)
-                        subtitles.append(subtitle)
+                        titles[i] = title
+                        subtitles[i] = subtitle
                         selection_idx += 1
                     
                     elif plot_type == 'JV Curve':
@@ -1138,19 +1257,22 @@ If you tested specific variables or conditions for each sample, please write the
                         if option1 == 'Best device per condition':
                             title = f"JV Curves - Best Measurement per Condition"
                         elif option1 == 'Best device only':
-                            filtered_df = data.get('filtered')
-                            if filtered_df is not None and not filtered_df.empty:
-                                best_idx = filtered_df["PCE(%)"].idxmax()
-                                best_sample = filtered_df.loc[best_idx]["sample"]
-                                best_cell = filtered_df.loc[best_idx]["cell"]
-                                title = f"JV Curves - Best Device ({best_sample} [Cell {best_cell}])"
+                            if best_device_label is None:
+                                best_device_label = ""
+                                pce = (filtered_df["PCE(%)"].to_numpy(dtype=float, na_value=np.nan)
+                                       if filtered_df is not None and not filtered_df.empty else None)
+                                if pce is not None and not np.isnan(pce).all():
+                                    best_pos = int(np.nanargmax(pce))
+                                    best_device_label = (f"{filtered_df['sample'].iat[best_pos]} "
+                                                         f"[Cell {filtered_df['cell'].iat[best_pos]}]")
+                            if best_device_label:
+                                title = f"JV Curves - Best Device ({best_device_label})"
                             else:
                                 title = f"JV Curves - {option1}"
                         else:
                             title = f"JV Curves - {option1}"
                         
-                        titles.append(title)
-                        subtitles.append(None)
+                        titles[i] = title
                         
                         # Check if this is a multi-figure plot (separated by cell/substrate)
                         if 'Separated' not in option1:
@@ -1163,18 +1285,18 @@ If you tested specific variables or conditions for each sample, please write the
 
                     else:
                         # Unknown plot type - use filename
-                        titles.append(names[i] if i < len(names) else f"Plot {i+1}")
-                        subtitles.append(None)
+                        titles[i] = names[i] if i < len(names) else f"Plot {i+1}"
                         selection_idx += 1
                 else:
                     # No more plot selections - use filename
-                    titles.append(names[i] if i < len(names) else f"Plot {i+1}")
-                    subtitles.append(None)
+                    titles[i] = names[i] if i < len(names) else f"Plot {i+1}"
             
             # Store plot data
             self.global_plot_data['figs'] = figs
             self.global_plot_data['names'] = names
-            self.global_plot_data['workbook'] = wb
+            # Excel export is built lazily on save, see _get_workbook_bytes
+            self.global_plot_data['export_data'] = filtered_data
+            self.global_plot_data['workbook'] = None
             self.global_plot_data['titles'] = titles
             self.global_plot_data['subtitles'] = subtitles
             self.download_zip_button.disabled = len(figs) == 0
@@ -1224,23 +1346,14 @@ If you tested specific variables or conditions for each sample, please write the
             filtered_df = filtered_df[~filtered_df['condition'].astype(str).isin(excluded_conditions)]
 
         # Apply numeric filters FIRST (before sample selection)
-        operators = {
-            '>': lambda series, val: series > val,
-            '>=': lambda series, val: series >= val,
-            '<': lambda series, val: series < val,
-            '<=': lambda series, val: series <= val,
-            '==': lambda series, val: series == val,
-            '!=': lambda series, val: series != val,
-        }
-
         for column, op, raw_value in self.jv_curve_analysis_ui.get_numeric_filters():
-            if column not in filtered_df.columns or op not in operators:
+            if column not in filtered_df.columns or op not in FILTER_OPERATORS:
                 continue
 
             threshold = float(raw_value)
-            numeric_series = pd.to_numeric(filtered_df[column], errors='coerce')
-            mask = operators[op](numeric_series, threshold)
-            filtered_df = filtered_df[mask.fillna(False)]
+            values = pd.to_numeric(filtered_df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            mask = FILTER_OPERATORS[op](values, threshold)
+            filtered_df = filtered_df[mask]
 
         return filtered_df
 
@@ -2129,92 +2242,47 @@ If you tested specific variables or conditions for each sample, please write the
         if filtered_jv_data.empty:
             return pd.DataFrame()
 
-        def _norm_text(value):
-            if pd.isna(value):
-                return None
-            return str(value)
+        if 'sample_id' not in original_curves_data.columns:
+            return original_curves_data.iloc[0:0].copy()
 
-        def _norm_cycle(value):
-            if pd.isna(value):
-                return None
-            try:
-                return int(value)
-            except Exception:
-                return None
-
-        filtered_combinations = set()
-        for _, row in filtered_jv_data.iterrows():
-            sample_key = row.get('sample_id', row.get('sample', None))
-            combination = (
-                _norm_text(sample_key),
-                _norm_text(row.get('cell', None)),
-                _norm_text(row.get('direction', None)),
-                _norm_text(row.get('ilum', None)),
-                _norm_text(row.get('px_number', None)),
-                _norm_cycle(row.get('cycle_number', None)),
-            )
-            filtered_combinations.add(combination)
-        
-        # Filter curves data to match exactly
-        def should_include_curve(curve_row):
-            if 'sample_id' not in curve_row:
-                return False
-            combination = (
-                _norm_text(curve_row.get('sample_id', curve_row.get('sample', None))),
-                _norm_text(curve_row.get('cell', None)),
-                _norm_text(curve_row.get('direction', None)),
-                _norm_text(curve_row.get('ilum', None)),
-                _norm_text(curve_row.get('px_number', None)),
-                _norm_cycle(curve_row.get('cycle_number', None)),
-            )
-            return combination in filtered_combinations
-        
-        matching_curves = original_curves_data[original_curves_data.apply(should_include_curve, axis=1)].copy()
+        mask = self.data_manager._curve_match_mask(original_curves_data, filtered_jv_data)
+        matching_curves = original_curves_data[mask].copy()
 
         return matching_curves
     
     def _create_filtered_curves_data(self, filtered_jv_data, original_curves_data):
         """Create curves data that matches filtered JV data with debugging"""
         
-        # Get sample-cell combinations from filtered JV data
-        filtered_combinations = set()
-        for _, row in filtered_jv_data.iterrows():
-            filtered_combinations.add((row['sample'], row['cell']))
+        if filtered_jv_data.empty or original_curves_data.empty:
+            return original_curves_data.iloc[0:0].copy()
         
-        # Try exact matching first
-        def should_include_curve(row):
-            return (row['sample'], row['cell']) in filtered_combinations
+        # Try exact matching on sample-cell combinations first
+        keys = pd.MultiIndex.from_frame(filtered_jv_data[['sample', 'cell']]).unique()
+        curve_index = pd.MultiIndex.from_frame(original_curves_data[['sample', 'cell']])
+        filtered_curves = original_curves_data[curve_index.isin(keys)].copy()
         
-        filtered_curves = original_curves_data[
-            original_curves_data.apply(should_include_curve, axis=1)
-        ].copy()
-        
-        print(f"DEBUG: Exact matching found {len(filtered_curves)} curve records")
+        debug_logger.add('CURVES', f"Exact matching found {len(filtered_curves)} curve records")
         
         # If exact matching fails, try alternative sample name matching
-        if len(filtered_curves) == 0:
-            print("DEBUG: Trying alternative sample name matching...")
-            
-            # Extract clean sample names from both datasets for comparison
-            jv_clean_samples = set()
-            for _, row in filtered_jv_data.iterrows():
-                # Extract the core sample name (like C-11)
-                clean_name = row['sample'].split('_')[-1] if '_' in row['sample'] else row['sample']
-                jv_clean_samples.add((clean_name, row['cell']))
-            
-            def should_include_curve_alt(row):
-                curve_clean = row['sample'].split('_')[-1] if '_' in row['sample'] else row['sample']
-                return (curve_clean, row['cell']) in jv_clean_samples
+        # (only useful when some sample names carry a prefix to strip)
+        if len(filtered_curves) == 0 and (
+            filtered_jv_data['sample'].astype(str).str.contains('_', regex=False).any()
+            or original_curves_data['sample'].astype(str).str.contains('_', regex=False).any()
+        ):
+            debug_logger.add('CURVES', "Trying alternative sample name matching")
             
-            filtered_curves = original_curves_data[
-                original_curves_data.apply(should_include_curve_alt, axis=1)
-            ].copy()
+            # Compare the core sample names (like C-11) of both datasets
+            jv_clean = filtered_jv_data['sample'].astype(str).str.rsplit('_', n=1).str[-1]
+            keys = pd.MultiIndex.from_arrays([jv_clean, filtered_jv_data['cell']]).unique()
+            curve_clean = original_curves_data['sample'].astype(str).str.rsplit('_', n=1).str[-1]
+            mask = pd.MultiIndex.from_arrays([curve_clean, original_curves_data['cell']]).isin(keys)
+            filtered_curves = original_curves_data[mask].copy()
             
-            print(f"DEBUG: Alternative matching found {len(filtered_curves)} curve records")
+            debug_logger.add('CURVES', f"Alternative matching found {len(filtered_curves)} curve records")
         
         # Always return a DataFrame, even if empty
         if filtered_curves is None or len(filtered_curves) == 0:
-            print("DEBUG: No matching curves found, returning empty DataFrame")
+            debug_logger.add('CURVES', "No matching curves found, returning empty DataFrame")
             return original_curves_data.iloc[0:0].copy()  # Return empty DataFrame with same structure
         
         return filtered_curves
@@ -2232,91 +2300,126 @@ If you tested specific variables or conditions for each sample, please write the
                 self.global_plot_data['names']
             )
             
-            b64 = base64.b64encode(zip_content).decode()
-            js_code = f"""
-            var link = document.createElement('a');
-            link.href = 'data:application/zip;base64,{b64}';
-            link.download = 'plots.zip';
-            document.body.appendChild(link);
-            link.click();
-            document.body.removeChild(link);
-            """
-            
             with self.save_ui.download_output:
-                display(widgets.HTML(f"<button onclick=\"{js_code}\">Click to download all plots</button>"))
-                print("Download initiated. If the download doesn't start automatically, click the button above.")
+                self._show_download_button(zip_content, 'plots.zip', 'application/zip',
+                                           "Click to download all plots")
         
         except Exception as e:
             ErrorHandler.log_error("saving plots", e, self.save_ui.download_output)
     
+    def _get_workbook_bytes(self):
+        """Build the 'All_data' Excel export on first use and cache the xlsx bytes"""
+        if self.global_plot_data.get('workbook') is not None:
+            return self.global_plot_data['workbook']
+        
+        export_data = self.global_plot_data.get('export_data')
+        if export_data is None:
+            return None
+        
+        import openpyxl  # only needed when the user actually saves data
+        
+        # Write-only workbook streams raw rows instead of materializing Cell objects
+        wb = openpyxl.Workbook(write_only=True)
+        main_sheet = wb.create_sheet(title='All_data')
+        main_sheet.append([None] + [str(col) for col in export_data.columns])
+        for row in export_data.itertuples(index=True, name=None):
+            main_sheet.append(row)
+        
+        excel_buffer = io.BytesIO()
+        wb.save(excel_buffer)
+        self.global_plot_data['workbook'] = excel_buffer.getvalue()
+        return self.global_plot_data['workbook']
+    
     def _on_save_data(self, b):
         """Handle data saving"""
-        if not self.global_plot_data.get('workbook'):
+        workbook_bytes = self._get_workbook_bytes()
+        if not workbook_bytes:
             with self.save_ui.download_output:
                 print("No data has been processed yet.")
             return
         
         try:
-            excel_buffer = io.BytesIO()
-            self.global_plot_data['workbook'].save(excel_buffer)
-            excel_buffer.seek(0)
-            
-            b64 = base64.b64encode(excel_buffer.getvalue()).decode()
-            js_code = f"""
-            var link = document.createElement('a');
-            link.href = 'data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}';
-            link.download = 'collected_data.xlsx';
-            document.body.appendChild(link);
-            link.click();
-            document.body.removeChild(link);
-            """
-            
             with self.save_ui.download_output:
-                display(widgets.HTML(f"<button onclick=\"{js_code}\">Click to download data</button>"))
-                print("Download initiated. If the download doesn't start automatically, click the button above.")
+                self._show_download_button(workbook_bytes, 'collected_data.xlsx',
+                                           'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                                           "Click to download data")
         
         except Exception as e:
             ErrorHandler.log_error("saving data", e, self.save_ui.download_output)
     
+    @staticmethod
+    def _html_page(plot_divs):
+        """Wrap figure divs in one HTML page that loads plotly.js from the CDN"""
+        from plotly.offline import get_plotlyjs_version
+        
+        return "".join([
+            '<html><head><meta charset="utf-8" />',
+            f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"></script>',
+            '</head><body>',
+            *plot_divs,
+            '</body></html>',
+        ])
+    
+    @staticmethod
+    def _show_download_button(payload, filename, mime_type, label):
+        """Display a button that downloads the payload bytes through a Blob URL"""
+        js_code = blob_download_js(payload, filename, mime_type)
+        display(widgets.HTML(f"<button onclick=\"{js_code}\">{label}</button>"))
+        print("Download initiated. If the download doesn't start automatically, click the button above.")
+    
+    ZIP_SPOOL_SIZE = 16 * 1024 * 1024  # bytes kept in memory before spilling to disk
+    
     def _on_save_all(self, b):
         """Handle saving all files"""
-        if not self.global_plot_data.get('figs') or not self.global_plot_data.get('workbook'):
+        workbook_bytes = self._get_workbook_bytes()
+        if not self.global_plot_data.get('figs') or not workbook_bytes:
             with self.save_ui.download_output:
                 print("No plots or data have been created yet.")
             return
         
         try:
-            # Create combined zip
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'a', zipfile.ZIP_DEFLATED, False) as zip_file:
-                # Add plots
-                for fig, name in zip(self.global_plot_data['figs'], self.global_plot_data['names']):
-                    try:
-                        html_str = fig.to_html(include_plotlyjs='cdn')
-                        zip_file.writestr(name, html_str)
-                    except Exception as e:
-                        print(f"Error saving {name}: {e}")
+            # Create combined zip; large archives spill to a temp file instead of RAM
+            with tempfile.SpooledTemporaryFile(max_size=self.ZIP_SPOOL_SIZE) as zip_spool:
+                # Fast deflate for the HTML; the xlsx is already a zip and is stored as-is
+                with zipfile.ZipFile(zip_spool, 'w', zipfile.ZIP_DEFLATED, False, compresslevel=1) as zip_file:
+                    # Add plots: each figure is rendered once as a div and collected into a
+                    # dashboard.html that loads plotly.js only once; unless the user asked
+                    # for the single dashboard, each div is also wrapped in its own page
+                    # (serialization runs on the I/O pool, zip writes stay on this thread)
+                    per_figure_files = not self.save_ui.use_single_html()
+                    names = self.global_plot_data['names']
+                    div_futures = [
+                        self._io_pool.submit(fig.to_html, include_plotlyjs=False, full_html=False,
+                                             div_id=os.path.splitext(name)[0])
+                        for fig, name in zip(self.global_plot_data['figs'], names)
+                    ]
+                    plot_divs = []
+                    failed = []
+                    for name, future in zip(names, div_futures):
+                        try:
+                            div = future.result()
+                            if per_figure_files:
+                                zip_file.writestr(name, self._html_page([div]))
+                            plot_divs.append(div)
+                        except Exception as e:
+                            failed.append(f"{name}: {e}")
+                    if plot_divs:
+                        zip_file.writestr("dashboard.html", self._html_page(plot_divs))
+                    
+                    # Add Excel file
+                    zip_file.writestr("collected_data.xlsx", workbook_bytes, compress_type=zipfile.ZIP_STORED)
                 
-                # Add Excel file
-                excel_buffer = io.BytesIO()
-                self.global_plot_data['workbook'].save(excel_buffer)
-                excel_buffer.seek(0)
-                zip_file.writestr("collected_data.xlsx", excel_buffer.getvalue())
-            
-            zip_buffer.seek(0)
-            b64 = base64.b64encode(zip_buffer.getvalue()).decode()
-            js_code = f"""
-            var link = document.createElement('a');
-            link.href = 'data:application/zip;base64,{b64}';
-            link.download = 'results.zip';
-            document.body.appendChild(link);
-            link.click();
-            document.body.removeChild(link);
-            """
+                zip_spool.seek(0)
+                zip_content = zip_spool.read()
             
             with self.save_ui.download_output:
-                display(widgets.HTML(f"<button onclick=\"{js_code}\">Click to download all files</button>"))
-                print("Download initiated. If the download doesn't start automatically, click the button above.")
+                self._show_download_button(zip_content, 'results.zip', 'application/zip',
+                                           "Click to download all files")
+                del zip_content
+                if failed:
+                    message = [f"{len(failed)} plot(s) could not be saved and are missing from the archive:"]
+                    message.extend(f"   {entry}" for entry in failed)
+                    print("\n".join(message))
         
         except Exception as e:
             ErrorHandler.log_error("saving all files", e, self.save_ui.download_output)
@@ -2350,13 +2453,8 @@ If you tested specific variables or conditions for each sample, please write the
 
     def get_current_color_scheme(self):
         """Get currently selected color scheme"""
-        if hasattr(self, 'color_selector'):
-            return self.color_selector.get_colors()
-        else:
+        if not hasattr(self, 'color_selector'):
             # Default colors if no selector
-            return [
-                'rgba(93, 164, 214, 0.7)', 'rgba(255, 144, 14, 0.7)', 
-                'rgba(44, 160, 101, 0.7)', 'rgba(255, 65, 54, 0.7)', 
-                'rgba(207, 114, 255, 0.7)', 'rgba(127, 96, 0, 0.7)',
-                'rgba(255, 140, 184, 0.7)', 'rgba(79, 90, 117, 0.7)'
-            ]
+            return list(_DEFAULT_COLORS)
+        
+        return self.color_selector.get_colors()
@@ -15,7 +15,7 @@ import sys
 from typing import Any, cast
 
 # Add parent directory for shared modules
-parent_dir = os.path.dirname(os.getcwd())
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
@@ -23,6 +23,11 @@ from api_calls import get_ids_in_batch, get_sample_description, get_all_JV
 from error_handler import ErrorHandler
 
 
+# Filter row operator strings -> vectorized comparison, shared by every filter path
+FILTER_OPERATORS = {"<": operator.lt, ">": operator.gt, "==": operator.eq,
+                    "<=": operator.le, ">=": operator.ge, "!=": operator.ne}
+
+
 def extract_status_from_metadata(data, metadata):
     """
     Extract status from API metadata containing filename
@@ -102,6 +107,8 @@ class DataManager:
         self.auth_manager = auth_manager
         self.data = {}
         self.unique_vals = []
+        self.identifier_parts = {}
+        self._loaded_batch_ids = None
         self.filtered_data = None
         self.omitted_data = None
         self.filter_parameters = []
@@ -115,6 +122,7 @@ class DataManager:
     def load_batch_data(self, batch_ids, output_widget=None):
         """Load data from selected batch IDs"""
         self.data = {}
+        self._loaded_batch_ids = None
         
         if not self.auth_manager.is_authenticated():
             ErrorHandler.log_error("Authentication required", output_widget=output_widget)
@@ -134,14 +142,16 @@ class DataManager:
             token = self.auth_manager.current_token
             
             # Get sample IDs and descriptions
-            sample_ids = get_ids_in_batch(url, token, batch_ids)  # <-- Holt Sample-IDs für Batch
-            identifiers = get_sample_description(url, token, sample_ids)  # <-- Holt Variation/Description für Samples
+            session = getattr(self.auth_manager, 'http', None)
+            sample_ids = get_ids_in_batch(url, token, batch_ids, session=session)  # <-- Holt Sample-IDs für Batch
+            identifiers = get_sample_description(url, token, sample_ids, session=session)  # <-- Holt Variation/Description für Samples
             
             df_jvc, df_cur = self._process_jv_data_for_analysis(sample_ids, output_widget, batch_ids)
             
             # Store data
             self.data["jvc"] = pd.concat([self.data.get("jvc", pd.DataFrame()), df_jvc], ignore_index=True)
             self.data["curves"] = pd.concat([self.data.get("curves", pd.DataFrame()), df_cur], ignore_index=True)
+            self.data["curves"] = self._categorize_curve_labels(self.data["curves"])
             
             # Verify data was loaded successfully before processing
             if self.data["jvc"].empty:
@@ -169,6 +179,7 @@ class DataManager:
             
             # Find unique values
             self.unique_vals = self._find_unique_values()
+            self.identifier_parts = self._split_identifiers(self.unique_vals)
             
             if output_widget:
                 with output_widget:
@@ -199,6 +210,7 @@ class DataManager:
         try:
             url = self.auth_manager.url
             token = self.auth_manager.current_token
+            session = getattr(self.auth_manager, 'http', None)
             
             if output_widget:
                 with output_widget:
@@ -219,8 +231,8 @@ class DataManager:
                         with output_widget:
                             print(f"Processing batch: {batch_id}")
                     
-                    batch_sample_ids = get_ids_in_batch(url, token, [batch_id])
-                    batch_jvs = get_all_JV(url, token, batch_sample_ids)
+                    batch_sample_ids = get_ids_in_batch(url, token, [batch_id], session=session)
+                    batch_jvs = get_all_JV(url, token, batch_sample_ids, session=session)
                     
                     all_jvs.update(batch_jvs)
                     successful_batches.append(batch_id)
@@ -470,50 +482,49 @@ class DataManager:
         if not hasattr(self, 'data') or 'curves' not in self.data or filtered_jv_df.empty:
             return pd.DataFrame()
 
-        def _norm_text(value):
-            if pd.isna(value):
-                return None
-            return str(value)
+        curves_data = self.data['curves']
+        if 'sample_id' not in curves_data.columns:
+            return curves_data.iloc[0:0].copy()
 
-        def _norm_cycle(value):
-            if pd.isna(value):
-                return None
-            try:
-                return int(value)
-            except Exception:
-                return None
+        mask = self._curve_match_mask(curves_data, filtered_jv_df)
+        return curves_data[mask].copy()
 
-        # Build normalized fixed-length keys.
-        filtered_combinations = set()
-        for _, row in filtered_jv_df.iterrows():
-            sample_key = row.get('sample_id', row.get('sample', None))
-            combination = (
-                _norm_text(sample_key),
-                _norm_text(row.get('cell', None)),
-                _norm_text(row.get('direction', None)),
-                _norm_text(row.get('ilum', None)),
-                _norm_text(row.get('px_number', None)),
-                _norm_cycle(row.get('cycle_number', None)),
-            )
-            filtered_combinations.add(combination)
+    CURVE_MATCH_COLUMNS = ('sample_id', 'cell', 'direction', 'ilum', 'px_number', 'cycle_number')
 
-        def should_include_curve(curve_row):
-            if 'sample_id' not in curve_row:
-                return False
-            combination = (
-                _norm_text(curve_row.get('sample_id', curve_row.get('sample', None))),
-                _norm_text(curve_row.get('cell', None)),
-                _norm_text(curve_row.get('direction', None)),
-                _norm_text(curve_row.get('ilum', None)),
-                _norm_text(curve_row.get('px_number', None)),
-                _norm_cycle(curve_row.get('cycle_number', None)),
-            )
-            return combination in filtered_combinations
-        
-        curves_data = self.data['curves']
-        matching_curves = curves_data[curves_data.apply(should_include_curve, axis=1)].copy()
-        
-        return matching_curves
+    @staticmethod
+    def _curve_match_keys(df):
+        """Normalized key columns used to pair curve rows with JV rows.
+
+        Text keys are compared as strings and cycle numbers as integers, with
+        missing values (or missing columns) matching each other.
+        """
+        keys = {}
+        for col in DataManager.CURVE_MATCH_COLUMNS:
+            source = col
+            if col == 'sample_id' and col not in df.columns:
+                source = 'sample'
+            if source not in df.columns:
+                dtype = float if col == 'cycle_number' else object
+                keys[col] = pd.Series(np.nan, index=df.index, dtype=dtype)
+                continue
+            values = df[source]
+            if col == 'cycle_number':
+                keys[col] = np.trunc(pd.to_numeric(values, errors='coerce'))
+            else:
+                keys[col] = values.astype(str).where(values.notna())
+        return pd.DataFrame(keys, index=df.index)
+
+    @staticmethod
+    def _curve_match_mask(curves_df, jv_df):
+        """Boolean mask over curves_df rows whose match key occurs in jv_df"""
+        cols = list(DataManager.CURVE_MATCH_COLUMNS)
+        jv_keys = DataManager._curve_match_keys(jv_df).drop_duplicates()
+        curve_keys = DataManager._curve_match_keys(curves_df)
+        curve_keys['_row'] = np.arange(len(curve_keys))
+        matched = curve_keys.merge(jv_keys, on=cols, how='inner')['_row'].to_numpy()
+        mask = np.zeros(len(curves_df), dtype=bool)
+        mask[matched] = True
+        return mask
     
     def _process_sample_info(self, identifiers):
         """Process sample information and create identifiers with enhanced deduplication"""
@@ -554,7 +565,10 @@ class DataManager:
         )
         
         # Add display batch name for UI purposes using original paths
-        self.data["jvc"]["display_batch"] = self.data["jvc"]["original_sample"].apply(extract_display_batch)
+        # (parsed once per sample path, every measurement row of a sample shares it)
+        original_samples = self.data["jvc"]["original_sample"]
+        display_batch_map = {path: extract_display_batch(path) for path in original_samples.unique()}
+        self.data["jvc"]["display_batch"] = original_samples.map(display_batch_map)
         
         self.data["jvc"]["identifier"] = self.data["jvc"]["sample"].apply(
             lambda x: x.split('/')[-1].split(".")[0]
@@ -569,6 +583,19 @@ class DataManager:
                 lambda x: "_".join(x.split('/')[-1].split(".")[0].split("_")[:-1])
             )
     
+    # Low-cardinality label columns of the curves table. Every JV measurement
+    # contributes a voltage and a current row, so these strings repeat a lot.
+    # sample/cell stay object dtype because they are used as multi-key groupby
+    # keys all over the plotting code (categoricals would add unobserved groups).
+    CURVE_CATEGORY_COLUMNS = ('batch', 'condition', 'variable', 'direction', 'ilum', 'status')
+    
+    def _categorize_curve_labels(self, df_cur):
+        """Store repeated label columns of the curves table as pandas categoricals"""
+        for col in self.CURVE_CATEGORY_COLUMNS:
+            if col in df_cur.columns and df_cur[col].dtype == object:
+                df_cur[col] = df_cur[col].astype('category')
+        return df_cur
+    
     def _export_data(self, df_jvc, df_cur):
         """Store data for potential export"""
         self.export_jvc_data = df_jvc
@@ -583,6 +610,22 @@ class DataManager:
         
         return unique_values
     
+    @staticmethod
+    def _split_identifiers(identifiers):
+        """Split each 'batch&variation' identifier once into (batch, variation).
+        
+        batch is None when the identifier carries no '&' separator.
+        """
+        parts = {}
+        for identifier in identifiers:
+            text = str(identifier)
+            if '&' in text:
+                batch, variation = text.split('&', 1)
+                parts[identifier] = (batch, variation)
+            else:
+                parts[identifier] = (None, text)
+        return parts
+    
     def apply_conditions(self, conditions_dict):
         """Apply conditions mapping to the data"""
         if "jvc" in self.data:
@@ -604,49 +647,49 @@ class DataManager:
             return True
         return False
     
-    def apply_filters(self, filter_list, direction_filter='Both', selected_items=None, verbose=True):
-        """Apply filters to the dataframe with improved two-step process"""
-        if not self.data or "jvc" not in self.data:
-            return None, None, []
+    def apply_filters(self, filter_list, direction_filter='Both', selected_items=None, verbose=True, df=None):
+        """Apply filters to the dataframe with improved two-step process
+        
+        Args:
+            df: DataFrame to filter (default: self.data['jvc']). It is not modified.
+        """
+        if df is None:
+            if not self.data or "jvc" not in self.data:
+                return None, None, []
+            df = self.data["jvc"]
         
         # Default filters if none provided
         if not filter_list:
             filter_list = [("PCE(%)", "<", "40"), ("FF(%)", "<", "89"), ("FF(%)", ">", "24"), 
                           ("Voc(V)", "<", "2"), ("Jsc(mA/cm2)", ">", "-30")]
         
-        # Operator mapping
-        operat = {"<": operator.lt, ">": operator.gt, "==": operator.eq,
-                  "<=": operator.le, ">=": operator.ge, "!=": operator.ne}
-        
-        data = self.data["jvc"].copy()
-        
-        # Initialize filter reason column
-        data['filter_reason'] = ''
+        # Combine boolean masks and materialize the result once at the end
+        keep = np.ones(len(df), dtype=bool)
+        failures = []  # (failed_mask, reason) in application order
         filtering_options = []
         
         # Apply sample/cell selection filter if provided
         sample_selection_filtered_count = 0
         if selected_items:
-            original_count = len(data)
-            
-            def is_selected(row):
-                cell_key = f"{row['sample']}_{row['cell']}"
-                return cell_key in selected_items
-            
-            selection_mask = data.apply(is_selected, axis=1)
-            data.loc[~selection_mask, 'filter_reason'] += 'sample/cell not selected, '
+            selected = np.fromiter(
+                (f"{sample}_{cell}" in selected_items for sample, cell in zip(df['sample'], df['cell'])),
+                dtype=bool, count=len(df)
+            )
+            failed = ~selected
+            failures.append((failed, 'sample/cell not selected, '))
+            keep &= ~failed
             
-            sample_selection_filtered_count = len(data[~selection_mask])
+            sample_selection_filtered_count = int(failed.sum())
             filtering_options.append(f'sample/cell selection ({sample_selection_filtered_count} filtered)')
         
         # Apply numeric filters
         for col, op, val in filter_list:
             try:
-                mask = operat[op](data[col], float(val))
-                before_count = len(data[data['filter_reason'] == ''])
-                data.loc[~mask, 'filter_reason'] += f'{col} {op} {val}, '
-                after_count = len(data[data['filter_reason'] == ''])
-                filtered_by_this_condition = before_count - after_count
+                values = df[col].to_numpy(dtype=float, na_value=np.nan)
+                failed = ~FILTER_OPERATORS[op](values, float(val))
+                filtered_by_this_condition = int((keep & failed).sum())
+                failures.append((failed, f'{col} {op} {val}, '))
+                keep &= ~failed
                 
                 if filtered_by_this_condition > 0:
                     filtering_options.append(f'{col} {op} {val} ({filtered_by_this_condition} filtered)')
@@ -656,22 +699,26 @@ class DataManager:
                     print(f"Warning: Could not apply filter {col} {op} {val}: {e}")
         
         # Apply direction filter
-        if direction_filter != 'Both' and 'direction' in data.columns:
-            before_count = len(data[data['filter_reason'] == ''])
-            direction_mask = data['direction'] != direction_filter
-            data.loc[direction_mask, 'filter_reason'] += f'direction != {direction_filter}, '
-            after_count = len(data[data['filter_reason'] == ''])
-            direction_filtered_count = before_count - after_count
+        if direction_filter != 'Both' and 'direction' in df.columns:
+            failed = (df['direction'] != direction_filter).to_numpy(dtype=bool)
+            direction_filtered_count = int((keep & failed).sum())
+            failures.append((failed, f'direction != {direction_filter}, '))
+            keep &= ~failed
             
             if direction_filtered_count > 0:
                 filtering_options.append(f'direction == {direction_filter} ({direction_filtered_count} filtered)')
         
         # Separate filtered and omitted data
-        omitted = data[data['filter_reason'] != ''].copy()
-        filtered = data[data['filter_reason'] == ''].copy()
+        filtered = df.loc[keep].copy()
+        filtered['filter_reason'] = ''
+        
+        omitted = df.loc[~keep].copy()
+        reasons = pd.Series('', index=df.index, dtype=object)
+        for failed, reason in failures:
+            reasons.loc[failed] += reason
         
         # Clean up filter reason string
-        omitted['filter_reason'] = omitted['filter_reason'].str.rstrip(', ')
+        omitted['filter_reason'] = reasons.loc[~keep].str.rstrip(', ')
         
         if 'display_batch' in filtered.columns:
             filtered['batch_for_plotting'] = filtered['display_batch']
@@ -816,6 +863,25 @@ class DataManager:
         """Get unique values"""
         return self.unique_vals
     
+    def get_loaded_batch_ids(self):
+        """Unique batch ids of the loaded JV data, computed once per load"""
+        if self._loaded_batch_ids is None:
+            if "jvc" not in self.data or 'batch' not in self.data["jvc"].columns:
+                return []
+            batch_col = self.data["jvc"]['batch']
+            if isinstance(batch_col.dtype, pd.CategoricalDtype):
+                self._loaded_batch_ids = batch_col.cat.categories.tolist()
+            else:
+                self._loaded_batch_ids = batch_col.unique().tolist()
+        return self._loaded_batch_ids
+    
+    def get_identifier_parts(self, identifier):
+        """Return the cached (batch, variation) split of an identifier"""
+        parts = self.identifier_parts.get(identifier)
+        if parts is None:
+            parts = self._split_identifiers([identifier])[identifier]
+        return parts
+    
     def get_filtered_data(self):
         """Get filtered data"""
         return self.filtered_data
@@ -875,8 +941,10 @@ class DataManager:
                 print("⚠️ No valid data for cycle filtering")
             return data
         
-        # Find best cycle per group
-        best_cycles = valid_data.loc[valid_data.groupby(grouping_cols)['PCE(%)'].idxmax()]
+        # Find best cycle per group (one vectorized idxmax, no sorting of group keys);
+        # keep the surviving rows in their original order like the other filters do
+        best_idx = valid_data.groupby(grouping_cols, sort=False)['PCE(%)'].idxmax()
+        best_cycles = valid_data[valid_data.index.isin(best_idx)]
         
         if verbose:
             original_count = len(data)
@@ -927,9 +995,9 @@ class DataManager:
                 print("ℹ️ No cycle information found in data - no filtering applied")
             return data
         
-        # Filter for selected cycles
-        mask = data['cycle_number'].isin(selected_cycles)
-        filtered_data = data[mask].copy()
+        # Filter for selected cycles (apply_filters copies the final selection)
+        mask = data['cycle_number'].isin(set(selected_cycles))
+        filtered_data = data[mask]
         
         if verbose:
             original_count = len(data)
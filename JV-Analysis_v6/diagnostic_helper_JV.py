@@ -3,6 +3,9 @@ Diagnostic Helper
 Quick checks for data structure and values
 """
 
+import textwrap
+
+
 class DebugLogger:
     """Collect debug messages for display in UI"""
     def __init__(self):
@@ -76,8 +79,13 @@ def diagnose_direction_values(data_manager):
         return
     
     # Show unique direction values
-    unique_directions = jvc['direction'].unique()
-    direction_counts = jvc['direction'].value_counts()
+    # One scan: counts including missing values, split into valid/missing below
+    all_counts = jvc['direction'].value_counts(dropna=False)
+    missing = all_counts.index.isna()
+    direction_counts = all_counts[~missing]
+    null_count = int(all_counts[missing].sum())
+    unique_directions = all_counts.index.to_list()
+    direction_set = set(unique_directions)
     
     print(f"\n✅ Found 'direction' column")
     print(f"\n📊 Unique direction values: {list(unique_directions)}")
@@ -92,28 +100,27 @@ def diagnose_direction_values(data_manager):
         
         # Look for cell_name patterns
         if 'variable' in curves.columns:
-            current_density_curves = curves[curves['variable'] == 'Current Density(mA/cm2)']
-            if not current_density_curves.empty:
-                print(f"   Current density curves: {len(current_density_curves)}")
+            # Only the two displayed columns are extracted, not whole curve rows
+            current_density_mask = (curves['variable'] == 'Current Density(mA/cm2)').to_numpy()
+            current_density_count = int(current_density_mask.sum())
+            if current_density_count:
+                print(f"   Current density curves: {current_density_count}")
                 
                 # Check for [1] and [2] patterns in index names
-                sample_curves = current_density_curves.head(10)
-                print(f"\n   Sample curve index patterns (first 10):")
-                for idx, row in sample_curves.iterrows():
-                    index_name = row.get('index', 'N/A')
-                    direction = row.get('direction', 'N/A')
-                    print(f"      {index_name} -> {direction}")
+                pattern_cols = [c for c in ('index', 'direction') if c in curves.columns]
+                patterns = (curves.loc[current_density_mask, pattern_cols].head(10)
+                            .reindex(columns=['index', 'direction']).astype(object).fillna('N/A'))
+                print(f"\n   Sample curve index patterns (first 10):\n"
+                      + textwrap.indent(patterns.to_string(index=False), "      "))
     
     # Check a few sample records with all relevant info
-    print(f"\n🔍 Sample records (first 5 with all metadata):")
     sample_data = jvc[['sample', 'cell', 'direction', 'status']].head(5)
-    
-    for idx, row in sample_data.iterrows():
-        print(f"   Sample: {row['sample']}, Cell: {row['cell']}, Direction: {row['direction']}, Status: {row.get('status', 'N/A')}")
+    print(f"\n🔍 Sample records (first 5 with all metadata):\n"
+          + textwrap.indent(sample_data.to_string(index=False), "   "))
     
     # Check if there are any unexpected values
     expected_directions = {'Forward', 'Reverse'}
-    unexpected = set(unique_directions) - expected_directions
+    unexpected = direction_set - expected_directions
     
     if unexpected:
         print(f"\n⚠️ WARNING: Unexpected direction values found: {unexpected}")
@@ -122,12 +129,11 @@ def diagnose_direction_values(data_manager):
         print(f"\n✅ All direction values are as expected: {expected_directions}")
     
     # Check for any None or NaN values
-    null_count = jvc['direction'].isna().sum()
     if null_count > 0:
         print(f"\n⚠️ WARNING: Found {null_count} records with missing direction values")
     
     # NEW: Statistical breakdown by direction
-    if len(unique_directions) == 2 and 'Forward' in unique_directions and 'Reverse' in unique_directions:
+    if direction_set == expected_directions:
         print(f"\n📊 Direction Balance:")
         forward_pct = (direction_counts.get('Forward', 0) / len(jvc)) * 100
         reverse_pct = (direction_counts.get('Reverse', 0) / len(jvc)) * 100
@@ -10,16 +10,127 @@ __created__ = "August 2025"
 
 import ipywidgets as widgets
 from IPython.display import display, clear_output, HTML, Markdown, Javascript
+import asyncio
 import base64
 import io
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 import plotly.graph_objects as go
 import requests
+import html
 import json
+import re
+import string
+import weakref
+import numpy as np
+import pandas as pd
 import plotly.express as px
 from diagnostic_helper_JV import debug_logger
 from auth_ui import AuthenticationUI
 
+
+class Timer:
+    """One-shot timer on the kernel's asyncio loop (see the ipywidgets 'Debouncing' docs)"""
+    
+    def __init__(self, timeout, callback):
+        self._timeout = timeout
+        self._callback = callback
+        self._task = None
+    
+    async def _job(self):
+        await asyncio.sleep(self._timeout)
+        self._callback()
+    
+    def start(self):
+        # Raises RuntimeError when no loop is running, see debounce()
+        self._task = asyncio.get_running_loop().create_task(self._job())
+    
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+
+
+def debounce(wait):
+    """Decorator that postpones a callback until `wait` seconds after its last call.
+    
+    Without an event loop (plain Python, tests) the callback runs immediately.
+    """
+    def decorator(fn):
+        timer = None
+        
+        def debounced(*args, **kwargs):
+            nonlocal timer
+            if timer is not None:
+                timer.cancel()
+            timer = Timer(wait, lambda: fn(*args, **kwargs))
+            try:
+                timer.start()
+            except RuntimeError:
+                timer = None
+                fn(*args, **kwargs)
+        return debounced
+    return decorator
+
+
+# Recent cycle summaries keyed by (id(df), len(df)); the weakref guards against id reuse
+_CYCLE_SUMMARY_CACHE = {}
+_CYCLE_SUMMARY_CACHE_SIZE = 4
+
+
+def _summarize_cycles(df):
+    """Cycle statistics for the cycle filter panel, or None if the table has no cycles.
+    
+    Pure pandas work with no widget access. Only sample, px_number and cycle_number
+    are read; those are never rewritten in place, so the result is cached per frame.
+    """
+    key = (id(df), len(df))
+    cached = _CYCLE_SUMMARY_CACHE.get(key)
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+    
+    summary = None
+    if 'cycle_number' in df.columns:
+        cycle_mask = df['cycle_number'].notna()
+        if cycle_mask.any():
+            # Only the three columns the stats need are copied
+            cycle_pixels = df.loc[cycle_mask, ['sample', 'px_number', 'cycle_number']]
+            # Categorical view of the cycle column: categories come out sorted and the
+            # per-pixel stats below work on small integer codes instead of floats
+            cycle_values = pd.Categorical(cycle_pixels['cycle_number'])
+            cycles_per_pixel = (cycle_pixels.assign(cycle_number=cycle_values.codes)
+                                .groupby(['sample', 'px_number'], sort=False)['cycle_number'].nunique())
+            summary = {
+                'available_cycles': cycle_values.categories.tolist(),
+                'n_pixels': len(cycles_per_pixel),
+                'n_multi': int((cycles_per_pixel > 1).sum()),
+            }
+    
+    if len(_CYCLE_SUMMARY_CACHE) >= _CYCLE_SUMMARY_CACHE_SIZE:
+        _CYCLE_SUMMARY_CACHE.pop(next(iter(_CYCLE_SUMMARY_CACHE)))
+    _CYCLE_SUMMARY_CACHE[key] = (weakref.ref(df), summary)
+    return summary
+
+
+def blob_download_js(payload, filename, mime_type):
+    """JavaScript that saves payload bytes as a file through a Blob URL.
+    
+    The browser decodes the base64 once into a Blob instead of keeping a
+    data: URL of the whole file around. Only single quotes are used, so the
+    code can also sit inside an onclick="..." attribute.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    return (
+        f"var bin = atob('{base64.b64encode(payload).decode('ascii')}');"
+        "var bytes = new Uint8Array(bin.length);"
+        "for (var i = bin.length; i--;) { bytes[i] = bin.charCodeAt(i); }"
+        f"var url = URL.createObjectURL(new Blob([bytes], {{type: '{mime_type}'}}));"
+        f"var a = document.createElement('a'); a.href = url; a.download = '{filename}';"
+        "document.body.appendChild(a); a.click(); document.body.removeChild(a);"
+        "setTimeout(function () { URL.revokeObjectURL(url); }, 1000);"
+    )
+
+
 class WidgetFactory:
     @staticmethod
     def create_button(description, button_style='', tooltip='', icon='', min_width=True):
@@ -84,12 +195,28 @@ class WidgetFactory:
 class FilterUI:
     """Handles filter-related UI components with sample-based condition selection"""
     
+    # Cycle info panel; only the numbers change between data loads
+    _CYCLE_INFO_TMPL = string.Template("""
+                <div style="background-color: #d4edda; padding: 12px; border-radius: 6px; margin: 5px 0; border-left: 4px solid #28a745;">
+                    <b>✅ Cycle Data Detected:</b><br>
+                    • <b>$n_cycles</b> cycles available: $cycles<br>
+                    • <b>$n_pixels</b> pixels with cycle data<br>
+                    • <b>$n_multi</b> pixels with multiple cycles<br>
+                    <br>
+                    <b>Filter Options:</b><br>
+                    • <b>All Cycles:</b> Show all measurements (no filtering)<br>
+                    • <b>Best Cycle Only:</b> Keep only highest PCE per pixel (DEFAULT)<br>
+                    • <b>Specific Cycles:</b> Select which cycles to include from dropdown below
+                </div>
+                """)
+    
     def __init__(self):
         self.filter_presets = {
             "Default": [("PCE(%)", "<", "40"), ("FF(%)", "<", "89"), ("FF(%)", ">", "24"), 
                        ("Voc(V)", "<", "2.5"), ("Voc(V)", ">", "0.5"), ("Jsc(mA/cm2)", "<", "0"), ("Jsc(mA/cm2)", ">", "-30")],
             "Preset 2": [("FF(%)", "<", "15"), ("PCE(%)", ">=", "10")]
         }
+        self._preset_rows = {}  # preset name -> filter row widgets, built on first use
         self._create_widgets()
         self._setup_observers()
         self._apply_preset()  # Initialize with default preset
@@ -130,7 +257,7 @@ class FilterUI:
             style={'font_weight': 'bold'}
         )
         
-        self.condition_selection_content = widgets.Output(
+        self.condition_selection_content = widgets.VBox(
             layout=widgets.Layout(
                 display='flex',
                 width='100%',
@@ -140,11 +267,17 @@ class FilterUI:
         
         # Store data and selections
         self.sample_data = None
-        self.selected_samples = set()
-        self.sample_checkboxes = {}
+        self.selected_samples = set()  # (batch, sample) tuples
+        self.sample_selectors = {}
+        self._selection_tables = None  # groupby results for the loaded jvc, see _get_selection_tables
+        self._last_status_key = None  # selection the status panel currently shows
+        
+        # Bulk selection changes (Select All / Clear All) collapse into one status refresh
+        self._schedule_sample_status = debounce(0.2)(self._update_sample_status)
         
         # Status widgets
-        self.condition_status_output = widgets.Output()
+        # Plain-text status, replaced with one value write per update
+        self.condition_status_output = widgets.HTML()
         
         self.condition_selection_box = widgets.VBox([
             self.condition_toggle_button,
@@ -223,47 +356,51 @@ class FilterUI:
         self.condition_toggle_button.on_click(self._toggle_condition_selection)
         
         # CRITICAL: Cycle dropdown observer MUST be added
-        self.cycle_dropdown.observe(self._on_cycle_mode_change, names='value')
+        self.cycle_dropdown.observe(debounce(0.2)(self._on_cycle_mode_change), names='value')
     
     def _on_cycle_mode_change(self, change):
         """Handle cycle mode changes"""
-        # CRITICAL: Log the change for debugging
-        print(f"🔄 Cycle mode changed to: {change['new']}")
+        debug_logger.add('CYCLE', f"Cycle mode changed to: {change['new']}")
         
         if change['new'] == 'Specific Cycles':
             self.specific_cycles_dropdown.layout.display = 'flex'
-            print(f"   ✅ Showing specific cycles dropdown")
         else:
             self.specific_cycles_dropdown.layout.display = 'none'
-            print(f"   ❌ Hiding specific cycles dropdown")
 
     def _add_filter_row(self, b):
         """Add a new filter row"""
         self.widget_groups.append(WidgetFactory.create_filter_row())
-        self.groups_container.children = self.widget_groups
+        self.groups_container.children = tuple(self.widget_groups)
 
     def _remove_filter_row(self, b):
         """Remove the last filter row"""
         if len(self.widget_groups) > 1:
             self.widget_groups.pop()
-            self.groups_container.children = self.widget_groups
+            self.groups_container.children = tuple(self.widget_groups)
 
     def _apply_preset(self, b=None):
         """Apply selected preset"""
         selected_preset = self.preset_dropdown.value
-        self.widget_groups.clear()
         
         if selected_preset in self.filter_presets:
-            for variable, operator, value in self.filter_presets[selected_preset]:
-                group = WidgetFactory.create_filter_row()
+            preset = self.filter_presets[selected_preset]
+            rows = self._preset_rows.get(selected_preset)
+            if rows is None:
+                # First use of this preset: create its rows once and keep them
+                rows = [WidgetFactory.create_filter_row() for _ in preset]
+                self._preset_rows[selected_preset] = rows
+            # Reset values, the user may have edited the rows since last time
+            for group, (variable, operator, value) in zip(rows, preset):
                 group.children[0].value = variable
                 group.children[1].value = operator
                 group.children[2].value = value
-                self.widget_groups.append(group)
+            new_rows = list(rows)
         else:
-            self.widget_groups.append(WidgetFactory.create_filter_row())
+            new_rows = [WidgetFactory.create_filter_row()]
         
-        self.groups_container.children = self.widget_groups
+        # Swap in all rows with a single children assignment
+        self.widget_groups = new_rows
+        self.groups_container.children = tuple(new_rows)
 
     def _toggle_condition_selection(self, b):
         """Toggle sample selection visibility"""
@@ -277,83 +414,43 @@ class FilterUI:
     def set_sample_data(self, data):
         """Set the data and create the sample selector"""
         self.sample_data = data
+        # Conditions may have been rewritten in place on the same frame
+        self._selection_tables = None
+        self._last_status_key = None
         
         if data and 'jvc' in data:
             df = data['jvc']
             
-            # Check for cycle data
-            has_cycles = ('cycle_number' in df.columns and 
-                         df['cycle_number'].notna().any())
-            
-            # CRITICAL DEBUG: Print current state
-            print(f"\n🔍 DEBUG - Cycle Widget Visibility Check:")
-            print(f"   has_cycles: {has_cycles}")
-            print(f"   cycle_filter_label exists: {hasattr(self, 'cycle_filter_label')}")
-            print(f"   cycle_dropdown exists: {hasattr(self, 'cycle_dropdown')}")
+            # Check for cycle data (cached summary, reloads of the same table are free)
+            cycle_summary = _summarize_cycles(df)
+            has_cycles = cycle_summary is not None
+            debug_logger.add('CYCLE', f"has_cycles: {has_cycles}")
             
             if has_cycles:
-                print(f"\n✅ Cycle data FOUND - Making widgets VISIBLE")
-                
                 # CRITICAL FIX: Set display to 'flex' (NOT 'block'!)
                 self.cycle_filter_label.layout.display = 'flex'
                 self.cycle_dropdown.layout.display = 'flex'
                 self.cycle_info_label.layout.display = 'flex'
                 
-                # DIAGNOSTIC: Verify the change took effect
-                print(f"   After setting visible:")
-                print(f"      cycle_filter_label.layout.display = '{self.cycle_filter_label.layout.display}'")
-                print(f"      cycle_dropdown.layout.display = '{self.cycle_dropdown.layout.display}'")
-                print(f"      cycle_info_label.layout.display = '{self.cycle_info_label.layout.display}'")
-                
-                # Get available cycles
-                cycle_pixels = df[df['cycle_number'].notna()]
-                available_cycles = sorted(cycle_pixels['cycle_number'].unique().tolist())
+                available_cycles = cycle_summary['available_cycles']
                 
                 # Update dropdown options
                 self.cycle_dropdown.options = ['All Cycles', 'Best Cycle Only', 'Specific Cycles']
-                self.specific_cycles_dropdown.options = [f"Cycle {int(c)}" for c in available_cycles]
-                
-                print(f"   Dropdown options set:")
-                print(f"      Main dropdown: {self.cycle_dropdown.options}")
-                print(f"      Specific cycles: {self.specific_cycles_dropdown.options}")
-                
-                # Statistics
-                unique_pixels = cycle_pixels.groupby(['sample', 'px_number']).size()
-                pixels_with_multiple_cycles = (cycle_pixels.groupby(['sample', 'px_number'])['cycle_number']
-                                               .nunique() > 1).sum()
+                self.specific_cycles_dropdown.options = [(f"Cycle {int(c)}", int(c)) for c in available_cycles]
                 
                 # Enhanced info label
-                info_html = f"""
-                <div style="background-color: #d4edda; padding: 12px; border-radius: 6px; margin: 5px 0; border-left: 4px solid #28a745;">
-                    <b>✅ Cycle Data Detected:</b><br>
-                    • <b>{len(available_cycles)}</b> cycles available: {available_cycles}<br>
-                    • <b>{len(unique_pixels)}</b> pixels with cycle data<br>
-                    • <b>{pixels_with_multiple_cycles}</b> pixels with multiple cycles<br>
-                    <br>
-                    <b>Filter Options:</b><br>
-                    • <b>All Cycles:</b> Show all measurements (no filtering)<br>
-                    • <b>Best Cycle Only:</b> Keep only highest PCE per pixel (DEFAULT)<br>
-                    • <b>Specific Cycles:</b> Select which cycles to include from dropdown below
-                </div>
-                """
-                self.cycle_info_label.value = info_html
-                
-                print(f"\n🎯 Cycle Filter UI Configured:")
-                print(f"   Available cycles: {available_cycles}")
-                print(f"   Widgets should now be VISIBLE in the UI")
-                print(f"   Default selection: {self.cycle_dropdown.value}")
+                self.cycle_info_label.value = self._CYCLE_INFO_TMPL.substitute(
+                    n_cycles=len(available_cycles),
+                    cycles=available_cycles,
+                    n_pixels=cycle_summary['n_pixels'],
+                    n_multi=cycle_summary['n_multi']
+                )
                 
-                # EXTRA DEBUG: Check if widgets are actually in the container
-                print(f"\n   Widget container children count: {len(self.direction_container.children)}")
-                for i, child in enumerate(self.direction_container.children):
-                    child_type = type(child).__name__
-                    print(f"      [{i}] {child_type}")
-                    if hasattr(child, 'layout') and hasattr(child.layout, 'display'):
-                        print(f"          display: {child.layout.display}")
+                debug_logger.add('CYCLE', f"Available cycles: {available_cycles}, "
+                                          f"default selection: {self.cycle_dropdown.value}")
+                print(f"🎯 Cycle filter ready: {len(available_cycles)} cycles available")
                 
             else:
-                print(f"\n❌ NO cycle data - Hiding widgets")
-                
                 # HIDE cycle filter controls
                 self.cycle_filter_label.layout.display = 'none'
                 self.cycle_dropdown.layout.display = 'none'
@@ -366,13 +463,11 @@ class FilterUI:
                 </div>
                 """
                 self.cycle_info_label.layout.display = 'flex'
-                
-                print(f"   Cycle filter hidden")
             
             # Create sample selector
             self._create_condition_selector()
         else:
-            print(f"   ⚠️ No data or 'jvc' column available")
+            debug_logger.add('CYCLE', "No data or 'jvc' table available")
 
     def get_cycle_filter_settings(self):
         """Get cycle filter settings"""
@@ -387,233 +482,249 @@ class FilterUI:
         elif mode == 'All Cycles':
             return {'mode': 'all'}
         elif mode == 'Specific Cycles':
-            selected = self.specific_cycles_dropdown.value
-            # Extract cycle numbers from "Cycle 0", "Cycle 1", etc.
-            cycle_numbers = [int(c.split()[1]) for c in selected]
-            return {'mode': 'specific', 'cycles': cycle_numbers}
+            # Option values are the cycle numbers themselves
+            return {'mode': 'specific', 'cycles': list(self.specific_cycles_dropdown.value)}
         else:
             return {'mode': 'all'}
 
     def _create_condition_selector(self):
-        """Create sample-based selector interface grouped by batch"""
-        with self.condition_selection_content:
-            clear_output(wait=True)
-            
-            if not self.sample_data or 'jvc' not in self.sample_data:
-                print("No data available for sample selection")
-                return
-            
-            df = self.sample_data['jvc']
-            
-            # Title
-            display(widgets.HTML("<h4>Select Samples to Include in Analysis:</h4>"))
-            
-            # Group by batch and sample, then get condition and counts
-            batch_sample_info = df.groupby(['batch', 'sample', 'condition']).agg({
-                'cell': 'nunique',  # unique cells per sample
-                'sample': 'size'    # total measurements per sample
-            }).rename(columns={'cell': 'num_cells', 'sample': 'num_measurements'})
-            
-            print(f"Dataset Overview:")
-            total_samples = len(batch_sample_info)
-            total_cells = batch_sample_info['num_cells'].sum()
-            total_measurements = batch_sample_info['num_measurements'].sum()
-            print(f"   • {total_samples} samples")
-            print(f"   • {total_cells} cells")
-            print(f"   • {total_measurements} measurements")
-            
-            # Quick selection buttons
-            clear_all_button = widgets.Button(
-                description="Clear All",
-                button_style='warning',
-                layout=widgets.Layout(width='100px')
-            )
-            
-            select_all_button = widgets.Button(
-                description="Select All",
-                button_style='info',
-                layout=widgets.Layout(width='100px')
+        """Create sample-based selector interface grouped by batch.
+        
+        The whole panel is assembled first and swapped into
+        condition_selection_content with one children assignment.
+        """
+        if not self.sample_data or 'jvc' not in self.sample_data:
+            self.condition_selection_content.children = (
+                widgets.HTML("No data available for sample selection"),
             )
+            return
+        
+        df = self.sample_data['jvc']
+        
+        # Title
+        title = widgets.HTML("<h4>Select Samples to Include in Analysis:</h4>")
+        
+        batch_sample_info = self._get_selection_tables()['batch_sample_info']
+        
+        total_samples = len(batch_sample_info)
+        total_cells = batch_sample_info['num_cells'].sum()
+        total_measurements = batch_sample_info['num_measurements'].sum()
+        overview = widgets.HTML(
+            "<pre style='margin: 0;'>Dataset Overview:\n"
+            f"   • {total_samples} samples\n"
+            f"   • {total_cells} cells\n"
+            f"   • {total_measurements} measurements</pre>"
+        )
+        
+        # Quick selection buttons
+        clear_all_button = widgets.Button(
+            description="Clear All",
+            button_style='warning',
+            layout=widgets.Layout(width='100px')
+        )
+        
+        select_all_button = widgets.Button(
+            description="Select All",
+            button_style='info',
+            layout=widgets.Layout(width='100px')
+        )
+        
+        # Button handlers for sample-based selection
+        def clear_all_samples(b):
+            """Clear all sample selections"""
+            self.selected_samples.clear()
+            self._update_sample_display()
+            self._schedule_sample_status()
+        
+        def select_all_samples(b):
+            """Select all available samples"""
+            self.selected_samples = {(batch, sample) for batch, sample, _ in batch_sample_info.index}
             
-            # Button handlers for sample-based selection
-            def clear_all_samples(b):
-                """Clear all sample selections"""
-                self.selected_samples.clear()
-                self._update_sample_display()
-                self._update_sample_status()
-            
-            def select_all_samples(b):
-                """Select all available samples"""
-                self.selected_samples = set()
-                selected_count = 0
-                for index, info in batch_sample_info.iterrows():
-                    batch, sample, condition = index
-                    sample_key = f"{batch}_{sample}"
-                    self.selected_samples.add(sample_key)
-                    selected_count += 1
-                
-                self._update_sample_display()
-                self._update_sample_status()
-            
-            clear_all_button.on_click(clear_all_samples)
-            select_all_button.on_click(select_all_samples)
-            
-            button_row = widgets.HBox([clear_all_button, select_all_button])
-            display(button_row)
-            
-            # Create sample checkboxes grouped by batch
-            self.sample_checkboxes = {}
-            
-            # Group data by batch for display
-            batches = df['batch'].unique()
-            batch_widgets = []
-            
-            for batch in sorted(batches):
-                batch_df = df[df['batch'] == batch]
-                batch_sample_info_for_display = batch_df.groupby(['sample', 'condition']).agg({
-                    'cell': 'nunique',
-                    'sample': 'size'
-                }).rename(columns={'cell': 'num_cells', 'sample': 'num_measurements'})
-                
-                # Get display batch name if available
-                display_batch = batch
-                if 'display_batch' in batch_df.columns:
-                    display_batch = batch_df['display_batch'].iloc[0]
-                
-                # Create batch header
-                batch_header = widgets.HTML(f"<h5>📁 Batch: {display_batch}</h5>")
-                
-                # Create sample checkboxes for this batch
-                sample_widgets = []
-                for index, info in batch_sample_info_for_display.iterrows():
-                    sample, condition = index
-                    num_cells = info['num_cells']
-                    num_measurements = info['num_measurements']
-                    
-                    checkbox_label = f"{sample} ({condition}) - {num_cells} cells, {num_measurements} measurements"
-                    
-                    checkbox = widgets.Checkbox(
-                        value=True,
-                        description=checkbox_label,
-                        style={'description_width': 'initial'},
-                        layout=widgets.Layout(
-                            margin='2px 0 2px 20px',
-                            width='auto'
-                        )
-                    )
-                    
-                    sample_key = f"{batch}_{sample}"
-                    
-                    # Handler for sample selection
-                    def create_sample_checkbox_handler(sample_key):
-                        def handler(change):
-                            if change['new']:
-                                self.selected_samples.add(sample_key)
-                            else:
-                                self.selected_samples.discard(sample_key)
-                            self._update_sample_status()
-                        return handler
-                    
-                    checkbox.observe(create_sample_checkbox_handler(sample_key), names='value')
-                    self.sample_checkboxes[sample_key] = checkbox
-                    sample_widgets.append(checkbox)
-                
-                # Add batch section
-                batch_section = widgets.VBox([batch_header] + sample_widgets)
-                batch_widgets.append(batch_section)
-            
-            # Display all batches
-            all_batches_display = widgets.VBox(
-                batch_widgets, 
-                layout=widgets.Layout(
-                    width='100%',
-                    overflow='visible'
-                )
+            self._update_sample_display()
+            self._schedule_sample_status()
+        
+        clear_all_button.on_click(clear_all_samples)
+        select_all_button.on_click(select_all_samples)
+        
+        button_row = widgets.HBox([clear_all_button, select_all_button])
+        
+        # One multi-select per batch instead of a checkbox per sample
+        self.sample_selectors = {}
+        
+        # Display names per batch, looked up once instead of per batch slice
+        display_batches = {}
+        if 'display_batch' in df.columns:
+            display_batches = df.drop_duplicates('batch').set_index('batch')['display_batch'].to_dict()
+        
+        # Initialize with all samples selected
+        self.selected_samples = {(batch, sample) for batch, sample, _ in batch_sample_info.index}
+        
+        batch_panels = []
+        titles = []
+        for batch, batch_info in batch_sample_info.groupby(level=0, sort=True):
+            batch_info = batch_info.droplevel(0)
+            batch_panels.append(self._create_batch_selector(batch, batch_info))
+            titles.append(f"📁 Batch: {display_batches.get(batch, batch)} ({len(batch_info)} samples)")
+        
+        batches_accordion = widgets.Accordion(
+            children=batch_panels,
+            layout=widgets.Layout(width='100%', overflow='visible')
+        )
+        for i, batch_title in enumerate(titles):
+            batches_accordion.set_title(i, batch_title)
+        if batch_panels:
+            batches_accordion.selected_index = 0
+        
+        # Swap the finished panel in at once, status display included
+        self.condition_selection_content.children = (
+            title,
+            overview,
+            button_row,
+            batches_accordion,
+            widgets.HTML("<h4>Selection Status:</h4>"),
+            self.condition_status_output,
+        )
+        
+        self._update_sample_status()
+
+    def _get_selection_tables(self):
+        """Groupby results behind the sample selector, computed once per loaded jvc table.
+        
+        Returns a dict with:
+            batch_sample_info: counts per (batch, sample, condition), sorted for display
+            sample_stats: condition and counts per sample, indexed by (batch, sample)
+            condition_codes / condition_names: factorized sample_stats['condition']
+                (names sorted, code -1 for a missing condition)
+            row_index: (batch, sample) -> positional row indices of that sample
+        """
+        df = self.sample_data['jvc']
+        tables = self._selection_tables
+        if tables is not None and tables['jvc'] is df:
+            return tables
+        
+        # Group by batch and sample, then get condition and counts
+        # (kept sorted so samples are listed in order within each batch)
+        batch_sample_info = df.groupby(['batch', 'sample', 'condition'], observed=True).agg(
+            num_cells=('cell', 'nunique'),       # unique cells per sample
+            num_measurements=('cell', 'size')    # total measurements per sample
+        )
+        
+        sample_stats = df.groupby(['batch', 'sample'], observed=True, sort=False).agg(
+            condition=('condition', 'first'),
+            num_cells=('cell', 'nunique'),
+            num_measurements=('cell', 'size')
+        )
+        condition_codes, condition_names = pd.factorize(sample_stats['condition'], sort=True)
+        
+        self._selection_tables = {
+            'jvc': df,
+            'batch_sample_info': batch_sample_info,
+            'sample_stats': sample_stats,
+            'condition_codes': condition_codes,
+            'condition_names': condition_names,
+            'row_index': df.groupby(['batch', 'sample'], sort=False).indices,
+        }
+        return self._selection_tables
+
+    def _create_batch_selector(self, batch, batch_info):
+        """Create the multi-select for one batch, registered in sample_selectors"""
+        options = [
+            (f"{sample} ({condition}) - {num_cells} cells, {num_measurements} measurements",
+             (batch, sample))
+            for (sample, condition), num_cells, num_measurements in zip(
+                batch_info.index, batch_info['num_cells'], batch_info['num_measurements']
             )
-            display(all_batches_display)
-            
-            # Status display
-            display(widgets.HTML("<h4>Selection Status:</h4>"))
-            display(self.condition_status_output)
-            
-            # Initialize with all samples selected
-            self.selected_samples = set()
-            for index, info in batch_sample_info.iterrows():
-                batch, sample, condition = index
-                sample_key = f"{batch}_{sample}"
-                self.selected_samples.add(sample_key)
-            self._update_sample_status()
+        ]
+        selector = widgets.SelectMultiple(
+            options=options,
+            value=tuple(key for _, key in options if key in self.selected_samples),
+            rows=min(10, len(options)),
+            layout=widgets.Layout(margin='2px 0 2px 20px', width='95%')
+        )
+        selector._sample_keys = tuple(key for _, key in options)
+        selector.observe(self._on_batch_selection_change, names='value')
+        self.sample_selectors[batch] = selector
+        return selector
+
+    def _on_batch_selection_change(self, change):
+        """Shared observer for all batch selectors"""
+        self.selected_samples = self.get_selected_samples()
+        self._schedule_sample_status()
+
+    def get_selected_samples(self):
+        """Union of the sample keys selected in every batch selector"""
+        selected = set()
+        for selector in self.sample_selectors.values():
+            selected.update(selector.value)
+        return selected
 
     def _update_sample_display(self):
-        """Update checkbox display to match selected_samples set"""
-        for sample_key, checkbox in self.sample_checkboxes.items():
-            checkbox.value = sample_key in self.selected_samples
+        """Update batch selectors to match selected_samples set"""
+        wanted = set(self.selected_samples)
+        for selector in self.sample_selectors.values():
+            selector.value = tuple(key for key in selector._sample_keys if key in wanted)
 
     def _update_sample_status(self):
         """Update status display for sample-based selection"""
-        with self.condition_status_output:
-            clear_output(wait=True)
-            
-            if not self.selected_samples:
-                print("No samples selected")
-                return
-            
-            if not self.sample_data or 'jvc' not in self.sample_data:
-                print("No sample data available")
-                return
+        # Spurious or net-zero selection events leave the panel as it is
+        key = frozenset(self.selected_samples)
+        if key == self._last_status_key:
+            return
+        self._last_status_key = key
+        
+        self.condition_status_output.value = (
+            "<pre style='margin: 0;'>" + html.escape(self._sample_status_text()) + "</pre>"
+        )
 
-            df = self.sample_data['jvc']
-            
-            # Calculate statistics for selected samples
-            selected_conditions = {}
-            total_measurements = 0
-            total_cells = 0
-            
-            for sample_key in self.selected_samples:
-                batch, sample = sample_key.split('_', 1)
-                
-                sample_df = df[(df['batch'] == batch) & (df['sample'] == sample)]
-                if not sample_df.empty:
-                    condition = sample_df['condition'].iloc[0]
-                    num_cells = sample_df['cell'].nunique()
-                    num_measurements = len(sample_df)
-                    
-                    if condition not in selected_conditions:
-                        selected_conditions[condition] = {
-                            'samples': 0,
-                            'cells': 0,
-                            'measurements': 0
-                        }
-                    
-                    selected_conditions[condition]['samples'] += 1
-                    selected_conditions[condition]['cells'] += num_cells
-                    selected_conditions[condition]['measurements'] += num_measurements
-                    
-                    total_cells += num_cells
-                    total_measurements += num_measurements
-            
-            print(f"📋 Selected {len(self.selected_samples)} samples:")
-            print(f"   📊 Total: {total_cells} cells, {total_measurements} measurements")
-            print()
-            
-            for condition, stats in sorted(selected_conditions.items()):
-                samples = stats['samples']
-                cells = stats['cells']
-                measurements = stats['measurements']
-                print(f"   • {condition}: {samples} samples, {cells} cells, {measurements} measurements")
-            
-            # Check if only expected conditions
-            expected = {'BL Printing', 'Slot_SAM', 'Spin_SAM'}
-            selected_condition_names = set(selected_conditions.keys())
-            
-            if selected_condition_names == expected:
-                print(f"\n🎯 Perfect! Only expected conditions selected.")
-            elif selected_condition_names.issubset(expected):
-                print(f"\n✅ Good! Only expected conditions (subset).")
-            else:
-                unexpected = selected_condition_names - expected
-                if unexpected:
-                    print(f"\n⚠️ Note: Additional conditions selected: {sorted(unexpected)}")
+    def _sample_status_text(self):
+        """Status text for the current sample selection"""
+        if not self.selected_samples:
+            return "No samples selected"
+        
+        if not self.sample_data or 'jvc' not in self.sample_data:
+            return "No sample data available"
+
+        # Statistics for the selected samples from the precomputed per-sample arrays
+        tables = self._get_selection_tables()
+        stats = tables['sample_stats']
+        positions = np.flatnonzero(stats.index.isin(list(self.selected_samples)))
+        num_cells = stats['num_cells'].to_numpy()[positions]
+        num_measurements = stats['num_measurements'].to_numpy()[positions]
+        total_cells = int(num_cells.sum())
+        total_measurements = int(num_measurements.sum())
+        
+        # Per-condition sums over the condition codes (sorted names, missing condition skipped)
+        codes = tables['condition_codes'][positions]
+        valid = codes >= 0
+        n_conditions = len(tables['condition_names'])
+        samples_per = np.bincount(codes[valid], minlength=n_conditions)
+        cells_per = np.bincount(codes[valid], weights=num_cells[valid], minlength=n_conditions)
+        measurements_per = np.bincount(codes[valid], weights=num_measurements[valid], minlength=n_conditions)
+        present = np.flatnonzero(samples_per)
+        
+        lines = [
+            f"📋 Selected {len(self.selected_samples)} samples:",
+            f"   📊 Total: {total_cells} cells, {total_measurements} measurements",
+            "",
+        ]
+        for code in present:
+            lines.append(f"   • {tables['condition_names'][code]}: {samples_per[code]} samples, "
+                         f"{int(cells_per[code])} cells, {int(measurements_per[code])} measurements")
+        
+        # Check if only expected conditions
+        expected = {'BL Printing', 'Slot_SAM', 'Spin_SAM'}
+        selected_condition_names = set(tables['condition_names'][present])
+        
+        if selected_condition_names == expected:
+            lines.append("\n🎯 Perfect! Only expected conditions selected.")
+        elif selected_condition_names.issubset(expected):
+            lines.append("\n✅ Good! Only expected conditions (subset).")
+        else:
+            unexpected = selected_condition_names - expected
+            if unexpected:
+                lines.append(f"\n⚠️ Note: Additional conditions selected: {sorted(unexpected)}")
+        
+        return "\n".join(lines)
 
     def get_selected_items(self):
         """Get list of selected sample_cell combinations from sample selection"""
@@ -624,37 +735,23 @@ class FilterUI:
             return None
         
         df = self.sample_data['jvc']
-        selected_cell_combinations = []
-                
-        # Recreate the batch_sample_info mapping locally
-        batch_sample_groups = df.groupby(['batch', 'sample', 'condition']).agg({
-            'cell': 'nunique',
-            'sample': 'size'  
-        }).rename(columns={'cell': 'num_cells', 'sample': 'num_measurements'})
-        
-        # Create a mapping from sample_key to (batch, sample)
-        sample_key_mapping = {}
-        for index, info in batch_sample_groups.iterrows():
-            batch, sample, condition = index
-            sample_key = f"{batch}_{sample}"
-            sample_key_mapping[sample_key] = (batch, sample)
-        
-        # Process each selected sample
-        for sample_key in self.selected_samples:
-            if sample_key in sample_key_mapping:
-                batch, sample = sample_key_mapping[sample_key]
-                
-                # Get all cells for this sample
-                sample_df = df[(df['batch'] == batch) & (df['sample'] == sample)]
-                
-                for _, row in sample_df.iterrows():
-                    cell_key = f"{row['sample']}_{row['cell']}"
-                    if cell_key not in selected_cell_combinations:
-                        selected_cell_combinations.append(cell_key)
+        
+        # Rows of the selected samples, looked up by their (batch, sample) keys
+        row_index = self._get_selection_tables()['row_index']
+        selected_rows = []
+        for batch, sample in sorted(self.selected_samples):
+            rows = row_index.get((batch, sample))
+            if rows is None:
+                print(f"Sample '{sample}' of batch '{batch}' not found in mapping")
             else:
-                print(f"Sample key '{sample_key}' not found in mapping")
+                selected_rows.append(rows)
         
-        return selected_cell_combinations
+        if not selected_rows:
+            return []
+        
+        rows = np.sort(np.concatenate(selected_rows))
+        pairs = df.iloc[rows, df.columns.get_indexer(['sample', 'cell'])].drop_duplicates()
+        return (pairs['sample'].astype(str) + '_' + pairs['cell'].astype(str)).drop_duplicates().tolist()
 
     def get_filter_values(self):
         """Get current filter values"""
@@ -686,6 +783,31 @@ class FilterUI:
 class PlotUI:
     """Handles plot selection UI components"""
     
+    # Plot type -> (Option 1 choices, Option 2 choices)
+    PLOT_TYPE_OPTIONS = {
+        # 'all' first; Option 2 is ALWAYS the same for boxplots - this is CORRECT
+        'Boxplot': (
+            ('all', 'Voc', 'Jsc', 'FF', 'PCE', 'R_ser', 'R_shu', 'V_mpp', 'J_mpp', 'P_mpp'),
+            ('by Batch', 'by Variable', 'by Sample', 'by Cell', 'by Scan Direction', 'by Subbatch'),
+        ),
+        'JV Curve': (
+            ('All cells',
+             'Only working cells',
+             'Rejected cells',
+             'Best device only',
+             'Best device per condition',
+             'Separated by cell (all)',
+             'Separated by cell (working only)',
+             'Separated by substrate (all)',
+             'Separated by substrate (working only)'),
+            ('',),
+        ),
+    }
+    
+    # Row patterns of the variable reorder table, in document order
+    _REORDER_ROW_INDEXED_RE = re.compile(r'<tr[^>]*data-value="([^"]*)"[^>]*data-index="(\d+)"')
+    _REORDER_ROW_RE = re.compile(r'<tr[^>]*data-value="([^"]*)"')
+    
     def __init__(self):
         self.plot_presets = {
             "Default": [
@@ -757,30 +879,40 @@ class PlotUI:
             self.plot_button
         ])
     
-    def _create_plot_type_row(self):
-        """Create a plot type selection row"""
+    def _create_plot_type_row(self, initial=None):
+        """Create a plot type selection row
+        
+        Args:
+            initial: optional (plot_type, option1, option2) the row starts with
+        """
+        plot_type, option1, option2 = initial or ('Boxplot', None, None)
+        option1_choices, option2_choices = self.PLOT_TYPE_OPTIONS.get(plot_type, ((), ()))
+        
         plot_type_dropdown = WidgetFactory.create_dropdown(
             options=['Boxplot', 'JV Curve'],
             description='Plot Type:',
-            width='100px'
+            width='100px',
+            value=plot_type
         )
         
         option1_dropdown = WidgetFactory.create_dropdown(
-            options=[],
+            options=option1_choices,
             description='Option 1:',
-            width='100px'
+            width='100px',
+            value=option1
         )
         
         option2_dropdown = WidgetFactory.create_dropdown(
-            options=[],
+            options=option2_choices,
             description='Option 2:',
-            width='100px'
+            width='100px',
+            value=option2
         )
         
-        # Update options based on plot type
-        self._update_plot_options(plot_type_dropdown, option1_dropdown, option2_dropdown)
+        # Update options based on plot type (keyboard scrolling through types settles first);
+        # registered after the initial values so building a row fires no option updates
         plot_type_dropdown.observe(
-            lambda change: self._update_plot_options(plot_type_dropdown, option1_dropdown, option2_dropdown),
+            debounce(0.08)(lambda change: self._update_plot_options(plot_type_dropdown, option1_dropdown, option2_dropdown)),
             names='value'
         )
         
@@ -788,29 +920,13 @@ class PlotUI:
     
     def _update_plot_options(self, plot_type_dropdown, option1_dropdown, option2_dropdown):
         """Update option dropdowns based on plot type"""
-        plot_type = plot_type_dropdown.value
-        
-        if plot_type == 'Boxplot':
-            # ADD 'all' to the beginning of the options list
-            option1_dropdown.options = ['all', 'Voc', 'Jsc', 'FF', 'PCE', 'R_ser', 'R_shu', 'V_mpp', 'J_mpp', 'P_mpp']
-            # Option 2 is ALWAYS the same for boxplots - this is CORRECT
-            option2_dropdown.options = ['by Batch', 'by Variable', 'by Sample', 'by Cell', 'by Scan Direction', 'by Subbatch']
-        elif plot_type == 'JV Curve':
-            option1_dropdown.options = [
-                'All cells', 
-                'Only working cells', 
-                'Rejected cells', 
-                'Best device only', 
-                'Best device per condition',
-                'Separated by cell (all)', 
-                'Separated by cell (working only)', 
-                'Separated by substrate (all)', 
-                'Separated by substrate (working only)'
-            ]
-            option2_dropdown.options = ['']
-        else:
-            option1_dropdown.options = []
-            option2_dropdown.options = []
+        option1, option2 = self.PLOT_TYPE_OPTIONS.get(plot_type_dropdown.value, ((), ()))
+        
+        # Reassigning options re-renders the dropdown and resets its value; skip when unchanged
+        if tuple(option1_dropdown.options) != option1:
+            option1_dropdown.options = option1
+        if tuple(option2_dropdown.options) != option2:
+            option2_dropdown.options = option2
     
     def _setup_observers(self):
         """Setup event observers"""
@@ -835,12 +951,8 @@ class PlotUI:
         self.plot_type_groups.clear()
         
         if selected_preset in self.plot_presets:
-            for plot_type, option1, option2 in self.plot_presets[selected_preset]:
-                new_group = self._create_plot_type_row()
-                new_group.children[0].value = plot_type
-                new_group.children[1].value = option1
-                new_group.children[2].value = option2
-                self.plot_type_groups.append(new_group)
+            for entry in self.plot_presets[selected_preset]:
+                self.plot_type_groups.append(self._create_plot_type_row(initial=entry))
         else:
             self.plot_type_groups.append(self._create_plot_type_row())
         
@@ -1221,16 +1333,12 @@ class PlotUI:
                     if hasattr(widget, 'value') and 'reorder_tbody' in str(widget.value):
                         html_str = str(widget.value)
                         
-                        # Extract rows with their full HTML to maintain order
-                        import re
                         # Find all rows in the order they appear in the HTML
-                        pattern = r'<tr[^>]*data-value="([^"]*)"[^>]*data-index="(\d+)"'
-                        matches = re.findall(pattern, html_str)
+                        matches = self._REORDER_ROW_INDEXED_RE.findall(html_str)
                         
                         if not matches:
                             # Try alternate pattern without data-index
-                            pattern = r'<tr[^>]*data-value="([^"]*)"'
-                            matches = re.findall(pattern, html_str)
+                            matches = self._REORDER_ROW_RE.findall(html_str)
                         
                         if matches:
                             # Extract just the values in their current order
@@ -1294,11 +1402,8 @@ class PlotUI:
                     html_content = str(widget.value)
                     debug_logger.add('REORDER', f"[EXTRACT] Found HTML table widget")
                     
-                    # Parse the data-value attributes from rows in order
-                    import re
                     # Find all data-value attributes in tr elements (in document order)
-                    pattern = r'<tr[^>]*data-value="([^"]*)"'
-                    matches = re.findall(pattern, html_content)
+                    matches = self._REORDER_ROW_RE.findall(html_content)
                     
                     if matches and len(matches) > 0:
                         debug_logger.add('REORDER', f"[EXTRACT] Found {len(matches)} rows with data-value attributes")
@@ -1685,37 +1790,54 @@ class SaveUI:
         self.save_plots_button = WidgetFactory.create_button('Save All Plots', 'primary')
         self.save_data_button = WidgetFactory.create_button('Save Data', 'info')
         self.save_all_button = WidgetFactory.create_button('Save Data & Plots', 'success')
+        self.single_html_checkbox = widgets.Checkbox(
+            value=False,
+            description='Save plots as a single HTML dashboard only',
+            style={'description_width': 'initial'},
+            layout=widgets.Layout(margin='10px 0')
+        )
         self.download_output = WidgetFactory.create_output()
     
+    def use_single_html(self):
+        """Whether 'Save Data & Plots' should skip the per-figure HTML files"""
+        return self.single_html_checkbox.value
+    
     def trigger_download(self, content, filename, content_type='text/json'):
         """Trigger file download"""
-        content_b64 = base64.b64encode(content if isinstance(content, bytes) else content.encode()).decode()
-        data_url = f'data:{content_type};charset=utf-8;base64,{content_b64}'
-        js_code = f"""
-            var a = document.createElement('a');
-            a.setAttribute('download', '{filename}');
-            a.setAttribute('href', '{data_url}');
-            a.click()
-        """
+        js_code = blob_download_js(content, filename, content_type)
         with self.download_output:
             clear_output()
             display(HTML(f'<script>{js_code}</script>'))
     
     def create_plots_zip(self, figures, names):
         """Create zip file with plots"""
+        import plotly.io as pio
+        
+        def render_png(fig):
+            try:
+                return pio.to_image(fig, format='png')
+            except Exception:
+                return None  # no image engine available, HTML only
+        
         zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'a', zipfile.ZIP_DEFLATED, False) as zip_file:
-            for fig, name in zip(figures, names):
+        # PNG renders happen in the image engine's subprocess, so they overlap in a small
+        # pool while the HTML pages are written; the zip itself is only touched here
+        with ThreadPoolExecutor(max_workers=max(1, min(4, len(figures)))) as pool, \
+                zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED, False, compresslevel=1) as zip_file:
+            png_futures = [pool.submit(render_png, fig) for fig in figures]
+            for fig, name, png_future in zip(figures, names, png_futures):
                 try:
-                    html_str = fig.to_html(include_plotlyjs='cdn')
-                    zip_file.writestr(name, html_str)
+                    # Plotly writes the page straight into the zip entry, no extra encoded copy
+                    with io.TextIOWrapper(zip_file.open(name, 'w'), encoding='utf-8') as html_file:
+                        fig.write_html(html_file, include_plotlyjs='cdn')
                     
-                    try:
-                        import plotly.io as pio
-                        img_bytes = pio.to_image(fig, format='png')
-                        zip_file.writestr(name.replace('.html', '.png'), img_bytes)
-                    except:
-                        pass
+                    img_bytes = png_future.result()
+                    if img_bytes is None:
+                        continue
+                    png_info = zipfile.ZipInfo(name.replace('.html', '.png'))
+                    png_info.compress_type = zipfile.ZIP_STORED
+                    with zip_file.open(png_info, 'w') as png_file:
+                        png_file.write(img_bytes)
                 except Exception as e:
                     print(f"Error saving {name}: {e}")
         
@@ -1733,36 +1855,62 @@ class SaveUI:
         return widgets.VBox([
             widgets.HTML("<h3>Save Plots and Data</h3>"),
             widgets.HBox([self.save_plots_button, self.save_data_button, self.save_all_button]),
+            self.single_html_checkbox,
             self.download_output
         ])
 
 
+# One color square of the palette preview
+_SWATCH_HTML = ('<span style="background-color: {}; width: 30px; height: 30px; display: inline-block; '
+                'margin: 2px; border: 1px solid #333; border-radius: 3px;"></span>')
+
+
 class ColorSchemeSelector:
     """Color scheme selector with preview"""
     
+    # rgb(r, g, b) / rgba(r, g, b, a) palette entries
+    _RGB_RE = re.compile(r'rgba?\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)')
+    
+    # (color_schemes, palette RGB arrays), built on first use and shared by all instances
+    _registry = None
+    
+    @classmethod
+    def _scheme_registry(cls):
+        """Palettes by name plus their parsed (n, 3) RGB arrays, created once per process"""
+        if cls._registry is None:
+            color_schemes = {
+                'Viridis': px.colors.sequential.Viridis,
+                'Plasma': px.colors.sequential.Plasma,
+                'Inferno': px.colors.sequential.Inferno,
+                'Magma': px.colors.sequential.Magma,
+                'Blues': px.colors.sequential.Blues,
+                'Reds': px.colors.sequential.Reds,
+                'Greens': px.colors.sequential.Greens,
+                'Plotly': px.colors.qualitative.Plotly,
+                'D3': px.colors.qualitative.D3,
+                'Set1': px.colors.qualitative.Set1,
+                'Set2': px.colors.qualitative.Set2,
+                'Default (old)': [
+                    'rgba(93, 164, 214, 0.7)', 'rgba(255, 144, 14, 0.7)', 
+                    'rgba(44, 160, 101, 0.7)', 'rgba(255, 65, 54, 0.7)', 
+                    'rgba(207, 114, 255, 0.7)', 'rgba(127, 96, 0, 0.7)',
+                    'rgba(255, 140, 184, 0.7)', 'rgba(79, 90, 117, 0.7)'
+                ]
+            }
+            palette_rgb = {name: cls._palette_to_rgb_array(palette)
+                           for name, palette in color_schemes.items()}
+            cls._registry = (color_schemes, palette_rgb)
+        return cls._registry
+    
     def __init__(self):
-        self.color_schemes = {
-            'Viridis': px.colors.sequential.Viridis,
-            'Plasma': px.colors.sequential.Plasma,
-            'Inferno': px.colors.sequential.Inferno,
-            'Magma': px.colors.sequential.Magma,
-            'Blues': px.colors.sequential.Blues,
-            'Reds': px.colors.sequential.Reds,
-            'Greens': px.colors.sequential.Greens,
-            'Plotly': px.colors.qualitative.Plotly,
-            'D3': px.colors.qualitative.D3,
-            'Set1': px.colors.qualitative.Set1,
-            'Set2': px.colors.qualitative.Set2,
-            'Default (old)': [
-                'rgba(93, 164, 214, 0.7)', 'rgba(255, 144, 14, 0.7)', 
-                'rgba(44, 160, 101, 0.7)', 'rgba(255, 65, 54, 0.7)', 
-                'rgba(207, 114, 255, 0.7)', 'rgba(127, 96, 0, 0.7)',
-                'rgba(255, 140, 184, 0.7)', 'rgba(79, 90, 117, 0.7)'
-            ]
-        }
+        # Shared palettes; the RGB arrays feed the gradient generation
+        self.color_schemes, self._palette_rgb = self._scheme_registry()
+        # (scheme, num_colors, sampling) -> colors; small fixed key space, so never evicted
+        self._color_cache = {}
         
         self.selected_scheme = 'Viridis'
         self.num_colors = 8  # Default number of colors
+        self._suspend_preview = False  # set while batch_set() writes several widgets
         self._create_widgets()
     
     def _create_widgets(self):
@@ -1798,6 +1946,9 @@ class ColorSchemeSelector:
             layout=widgets.Layout(width='400px', height='60px', border='1px solid #ccc')
         )
         
+        # Slider drags fire for every intermediate value; only the last one redraws the preview
+        self._schedule_preview = debounce(0.08)(self._update_preview)
+        
         self.color_dropdown.observe(self._on_color_change, names='value')
         self.sampling_dropdown.observe(self._on_sampling_change, names='value')
         self.num_colors_slider.observe(self._on_num_colors_change, names='value')
@@ -1811,15 +1962,40 @@ class ColorSchemeSelector:
         ])
 
     def _on_sampling_change(self, change):
-        self._update_preview()
+        self._request_preview()
     
     def _on_color_change(self, change):
         self.selected_scheme = change['new']
-        self._update_preview()
+        self._request_preview()
     
     def _on_num_colors_change(self, change):
         """Handle number of colors change"""
         self.num_colors = change['new']
+        self._request_preview()
+    
+    def _request_preview(self):
+        if not self._suspend_preview:
+            self._schedule_preview()
+    
+    def batch_set(self, scheme=None, sampling=None, num_colors=None):
+        """
+        Set several selector values and redraw the preview once
+        
+        Args:
+            scheme: Color scheme name
+            sampling: 'sequential' or 'even'
+            num_colors: Number of colors (will be clamped to 2-20)
+        """
+        self._suspend_preview = True
+        try:
+            if scheme is not None:
+                self.color_dropdown.value = scheme
+            if sampling is not None:
+                self.sampling_dropdown.value = sampling
+            if num_colors is not None:
+                self.num_colors_slider.value = max(2, min(20, num_colors))
+        finally:
+            self._suspend_preview = False
         self._update_preview()
     
     def _update_preview(self):
@@ -1833,82 +2009,34 @@ class ColorSchemeSelector:
             else:
                 sampling_text = "Continuous Gradient"
             
-            html_preview = '<div style="display: flex; flex-direction: column; padding: 5px;">'
-            html_preview += f'<span style="margin-bottom: 5px; font-weight: bold;">{self.selected_scheme} ({sampling_text}): {len(colors)} colors</span>'
-            html_preview += '<div style="display: flex; flex-wrap: wrap;">'
-            
-            for color in colors:
-                html_preview += f'<span style="background-color: {color}; width: 30px; height: 30px; display: inline-block; margin: 2px; border: 1px solid #333; border-radius: 3px;"></span>'
-            
-            html_preview += '</div></div>'
-            
-            display(HTML(html_preview))
+            swatches = ''.join(_SWATCH_HTML.format(color) for color in colors)
+            display(HTML(
+                '<div style="display: flex; flex-direction: column; padding: 5px;">'
+                f'<span style="margin-bottom: 5px; font-weight: bold;">{self.selected_scheme} ({sampling_text}): {len(colors)} colors</span>'
+                f'<div style="display: flex; flex-wrap: wrap;">{swatches}</div></div>'
+            ))
     
-    def _interpolate_color(self, hex_color1, hex_color2, factor):
-        """
-        Interpolate between two colors (supports both hex and rgba formats)
-        factor: 0.0 = color1, 1.0 = color2
+    @classmethod
+    def _palette_to_rgb_array(cls, palette):
         """
-        # Convert hex to RGB
-        def hex_to_rgb(color):
-            """Convert color from hex or rgba format to RGB tuple"""
-            if isinstance(color, str):
-                # Handle rgba(r, g, b, a) format
-                if color.startswith('rgba'):
-                    # Extract RGBA values: rgba(93, 164, 214, 0.7)
-                    import re
-                    match = re.match(r'rgba\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*([\d.]+)\s*\)', color)
-                    if match:
-                        r, g, b, a = match.groups()
-                        return (int(r) / 255.0, int(g) / 255.0, int(b) / 255.0)
-                
-                # Handle hex format: #RRGGBB
-                color = color.lstrip('#')
-                if len(color) >= 6:
-                    return tuple(int(color[i:i+2], 16) / 255.0 for i in (0, 2, 4))
-            
-            # Fallback: return neutral color if parsing fails
-            return (0.5, 0.5, 0.5)
-        
-        # Convert RGB to hex
-        def rgb_to_hex(r, g, b):
-            return '#{:02x}{:02x}{:02x}'.format(int(r*255), int(g*255), int(b*255))
-        
-        rgb1 = hex_to_rgb(hex_color1)
-        rgb2 = hex_to_rgb(hex_color2)
-        
-        # Linear interpolation
-        r = rgb1[0] + (rgb2[0] - rgb1[0]) * factor
-        g = rgb1[1] + (rgb2[1] - rgb1[1]) * factor
-        b = rgb1[2] + (rgb2[2] - rgb1[2]) * factor
-        
-        return rgb_to_hex(r, g, b)
-    
-    def _ensure_hex_format(self, color):
-        """
-        Convert color to hex format if it's in rgba format
-        
-        Args:
-            color: Color string (hex or rgba format)
+        Parse a palette of hex, rgb() or rgba() strings
         
         Returns:
-            Color in hex format (#RRGGBB)
+            Array of shape (len(palette), 3) with RGB values in [0, 1];
+            colors that cannot be parsed become neutral gray
         """
-        if isinstance(color, str):
-            # Already hex format
-            if color.startswith('#'):
-                return color
-            
-            # Convert rgba format to hex
-            if color.startswith('rgba'):
-                import re
-                match = re.match(r'rgba\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*([\d.]+)\s*\)', color)
-                if match:
-                    r, g, b, a = match.groups()
-                    return '#{:02x}{:02x}{:02x}'.format(int(r), int(g), int(b))
-        
-        # Fallback: return gray if conversion fails
-        return '#808080'
+        rgb = np.full((len(palette), 3), 0.5)
+        for i, color in enumerate(palette):
+            if not isinstance(color, str):
+                continue
+            match = cls._RGB_RE.match(color)
+            if match:
+                rgb[i] = [int(c) / 255.0 for c in match.groups()]
+            else:
+                hex_digits = color.lstrip('#')
+                if len(hex_digits) >= 6:
+                    rgb[i] = [int(hex_digits[j:j+2], 16) / 255.0 for j in (0, 2, 4)]
+        return rgb
     
     def _generate_continuous_colors(self, num_colors):
         """
@@ -1921,42 +2049,22 @@ class ColorSchemeSelector:
             List of hex colors evenly distributed across the palette
         """
         # Get base palette for the selected scheme
-        base_palette = self.color_schemes[self.selected_scheme]
+        palette = self._palette_rgb[self.selected_scheme]
+        last = len(palette) - 1
         
-        if num_colors <= len(base_palette):
+        if num_colors <= len(palette):
             # If requested colors <= available colors, just select evenly
-            step = (len(base_palette) - 1) / (num_colors - 1) if num_colors > 1 else 0
-            selected_colors = [base_palette[int(i * step)] for i in range(num_colors)]
-            return [self._ensure_hex_format(color) for color in selected_colors]
+            step = last / (num_colors - 1) if num_colors > 1 else 0
+            rgb = palette[(np.arange(num_colors) * step).astype(int)]
         else:
-            # If requested colors > available colors, interpolate between palette colors
-            colors = []
-            
-            for i in range(num_colors):
-                # Position in the palette (0.0 to 1.0)
-                position = i / (num_colors - 1) if num_colors > 1 else 0
-                
-                # Map position to base palette
-                palette_index = position * (len(base_palette) - 1)
-                lower_index = int(palette_index)
-                upper_index = min(lower_index + 1, len(base_palette) - 1)
-                
-                # Interpolation factor between the two neighboring palette colors
-                factor = palette_index - lower_index
-                
-                # Get the two colors from palette
-                color1 = base_palette[lower_index]
-                color2 = base_palette[upper_index]
-                
-                # Interpolate between them
-                if factor == 0 or lower_index == upper_index:
-                    interpolated = self._ensure_hex_format(color1)
-                else:
-                    interpolated = self._interpolate_color(color1, color2, factor)
-                
-                colors.append(interpolated)
-            
-            return colors
+            # If requested colors > available colors, blend the two neighboring palette colors
+            positions = np.linspace(0, last, num_colors)
+            lower = np.floor(positions).astype(int)
+            upper = np.minimum(lower + 1, last)
+            factor = (positions - lower)[:, None]
+            rgb = palette[lower] * (1 - factor) + palette[upper] * factor
+        
+        return ['#{:02x}{:02x}{:02x}'.format(r, g, b) for r, g, b in np.rint(rgb * 255).astype(int).tolist()]
     
     def get_colors(self, num_colors=None, sampling='sequential'):
         """Get colors from selected scheme
@@ -1971,21 +2079,25 @@ class ColorSchemeSelector:
         if num_colors is None:
             num_colors = self.num_colors
         
+        key = (self.selected_scheme, num_colors, sampling)
+        cached = self._color_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
         colors = self.color_schemes[self.selected_scheme]
         
         if sampling == 'even' and len(colors) > num_colors:
             if num_colors == 1:
-                return [colors[len(colors)//2]]
-            
-            indices = []
-            for i in range(num_colors):
-                index = int(round(i * (len(colors) - 1) / (num_colors - 1)))
-                indices.append(index)
-            
-            return [colors[i] for i in indices]
+                result = [colors[len(colors)//2]]
+            else:
+                result = [colors[int(round(i * (len(colors) - 1) / (num_colors - 1)))]
+                          for i in range(num_colors)]
         else:
             # Use continuous color generation for all other cases
-            return self._generate_continuous_colors(num_colors)
+            result = self._generate_continuous_colors(num_colors)
+        
+        self._color_cache[key] = tuple(result)
+        return result
 
     def set_num_colors(self, num_colors):
         """
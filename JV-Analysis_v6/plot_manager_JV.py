@@ -16,10 +16,12 @@ import pandas as pd
 import os
 import sys
 import math  # Add this import for ceiling calculation
+import functools
+import re
 from typing import Any, cast
 
 # Add parent directory for shared modules
-parent_dir = os.path.dirname(os.getcwd())
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
@@ -30,12 +32,62 @@ except ImportError:
     def save_combined_excel_data(*args, **kwargs):
         return None
 
+DEFAULT_COLOR_SCHEME = (
+    'rgba(93, 164, 214, 0.7)', 'rgba(255, 144, 14, 0.7)',
+    'rgba(44, 160, 101, 0.7)', 'rgba(255, 65, 54, 0.7)',
+    'rgba(207, 114, 255, 0.7)', 'rgba(127, 96, 0, 0.7)',
+    'rgba(255, 140, 184, 0.7)', 'rgba(79, 90, 117, 0.7)'
+)
+
+@functools.lru_cache(maxsize=64)
+def _extract_rgb_from_color(color_string):
+    """Extract RGB values from color string"""
+    if 'rgba(' in color_string:
+        rgba_values = color_string.replace('rgba(', '').replace(')', '').split(',')
+        return int(rgba_values[0]), int(rgba_values[1]), int(rgba_values[2]), float(rgba_values[3])
+    elif color_string.startswith('#'):
+        hex_color = color_string.lstrip('#')
+        if len(hex_color) == 6:
+            return int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16), 0.7
+    return 93, 164, 214, 0.7  # Default fallback
+
+for _color in DEFAULT_COLOR_SCHEME:
+    _extract_rgb_from_color(_color)
+
 def _flatten_multiindex_columns(self, df):
     """Flatten MultiIndex columns if they exist"""
     if isinstance(df.columns, pd.MultiIndex):
         df.columns = ['_'.join(col).strip() for col in df.columns.values]
     return df
 
+# Grouping tokens in priority order (Option 2):
+# prefer 'g' (condition), then 'e' (batch), 'a' (sample), 'b' (cell),
+# 'c' (direction), 's' (status), 'd' (ilum), 'k' (subbatch)
+_VARX_PRIORITY = (
+    ("g", "condition"), ("e", "batch"), ("a", "sample"), ("b", "cell"),
+    ("c", "direction"), ("s", "status"), ("d", "ilum"), ("k", "subbatch")
+)
+_VARY_CODES = {"v": "voc", "j": "jsc", "f": "ff", "p": "pce", "u": "vmpp", "i": "jmpp", "m": "pmpp", "r": "rser", "h": "rshu"}
+# Boxplot codes are <prefix><parameter><grouping>; 'all' codes carry no parameter letter
+_BOXPLOT_CODE_RE = re.compile(r'^(Ball|Jall|B|J)(.*)$')
+
+def _parse_boxplot_code(pl):
+    """Return (var_x, var_y) for a boxplot code; either may be None."""
+    match = _BOXPLOT_CODE_RE.match(pl)
+    if match is None:
+        return None, None
+
+    prefix, suffix = match.groups()
+    if prefix in ("Ball", "Jall"):
+        var_y = None
+        grouping = suffix
+    else:
+        var_y = _VARY_CODES.get(suffix[:1])
+        grouping = suffix[1:]
+
+    var_x = next((name for key, name in _VARX_PRIORITY if key in grouping), None)
+    return var_x, var_y
+
 def plotting_string_action(plot_list, data, supp, is_voila=False, color_scheme=None, separate_scan_dir=False, font_size_axis=None, font_size_title=None, font_size_legend=None, jv_line_width=None, condition_order=None):
     """
     Main plotting function that processes plot codes and creates figures.
@@ -66,139 +118,110 @@ def plotting_string_action(plot_list, data, supp, is_voila=False, color_scheme=N
         plot_manager.set_jv_line_width(jv_line_width)
 
     if color_scheme is None:
-        color_scheme = [
-            'rgba(93, 164, 214, 0.7)', 'rgba(255, 144, 14, 0.7)', 
-            'rgba(44, 160, 101, 0.7)', 'rgba(255, 65, 54, 0.7)', 
-            'rgba(207, 114, 255, 0.7)', 'rgba(127, 96, 0, 0.7)',
-            'rgba(255, 140, 184, 0.7)', 'rgba(79, 90, 117, 0.7)'
-        ]
-
-    # Mapping dictionaries for plot codes
-    varx_dict = {"a": "sample", "b": "cell", "c": "direction", "d": "ilum", "e": "batch", "g": "condition", "s": "status", "k": "subbatch"}
-    vary_dict = {"v": "voc", "j": "jsc", "f": "ff", "p": "pce", "u": "vmpp", "i": "jmpp", "m": "pmpp", "r": "rser", "h": "rshu"}
+        color_scheme = list(DEFAULT_COLOR_SCHEME)
 
-    fig_list = []
-    fig_names = []
-    
     # Convert plot selections to codes if needed
     if isinstance(plot_list[0], tuple):
         plot_codes = plot_list_from_voila(plot_list)
     else:
         plot_codes = plot_list
 
+    def _single(fig, fig_name):
+        # CRITICAL: Only keep the figure if it was actually created
+        if fig is not None and fig_name is not None:
+            return [fig], [fig_name]
+        return [], []
+
+    def _jv_single(result):
+        fig, fig_name = result
+        return _single(plot_manager.apply_jv_line_width_to_figure(fig), fig_name)
+
+    def _jv_multi(result):
+        figs, fig_names_temp = result
+        if isinstance(figs, list) and isinstance(fig_names_temp, list):
+            return [plot_manager.apply_jv_line_width_to_figure(f) for f in figs], fig_names_temp
+        return [plot_manager.apply_jv_line_width_to_figure(figs)], [fig_names_temp]
+
+    # Handlers return (figs, names), or None to fall through to the next matching token
+    def _handle_ball(pl):
+        # Combined grid for 'all' – now gets correct var_x from Option 2
+        var_x, _ = _parse_boxplot_code(pl)
+        if not var_x:
+            return None
+        return _single(*plot_manager.create_combined_boxplot_grid(
+            filtered_jv, var_x,
+            [omitted_jv, filter_pars],
+            "data", colors=color_scheme,
+            separate_scan_dir=separate_scan_dir
+        ))
+
+    def _handle_boxplot(pl):
+        var_x, var_y = _parse_boxplot_code(pl)
+        if not (var_x and var_y):
+            return None
+        fig, fig_name, wb, title_text, subtitle = plot_manager.create_boxplot(
+            filtered_jv, var_x, var_y,
+            [omitted_jv, filter_pars],
+            "data", colors=color_scheme,
+            separate_scan_dir=separate_scan_dir
+        )
+        return _single(fig, fig_name)
+
+    def _handle_rejected(pl):
+        if omitted_jv.empty:
+            print(f"  No rejected data available!")
+
+        # Create filtered curves that match only the omitted JV data
+        rejected_curves = plot_manager._create_matching_curves_data(omitted_jv, complete_curves)
+
+        print(f"  Rejected curves after filtering: {len(rejected_curves)}")
+
+        return _jv_single(plot_manager.create_jv_non_working_cells_plot(omitted_jv, rejected_curves, colors=color_scheme))
+
+    # Tokens are checked in this order, so "Ball" wins over "B"
+    plot_handlers = (
+        ("Ball", _handle_ball),
+        ("B", _handle_boxplot),
+        ("Cb", lambda pl: _jv_single(plot_manager.create_jv_best_per_condition_plot(
+            filtered_jv, filtered_curves, colors=color_scheme, condition_order=condition_order))),
+        ("Cw", lambda pl: _jv_single(plot_manager.create_jv_best_device_plot(
+            filtered_jv, filtered_curves, colors=color_scheme))),
+        ("Cy", lambda pl: _jv_single(plot_manager.create_jv_all_cells_plot(
+            complete_jv, filtered_curves, colors=color_scheme))),
+        ("Cz", lambda pl: _jv_single(plot_manager.create_jv_working_cells_plot(
+            filtered_jv, plot_manager._create_matching_curves_data(filtered_jv, complete_curves),
+            colors=color_scheme))),
+        ("Co", _handle_rejected),
+        ("Cx", lambda pl: _jv_multi(plot_manager.create_jv_separated_by_cell_plot(
+            complete_jv, complete_curves, colors=color_scheme))),
+        ("Cd", lambda pl: _jv_multi(plot_manager.create_jv_separated_by_substrate_plot(
+            complete_jv, complete_curves, colors=color_scheme, plot_type="all"))),
+    )
+
+    fig_list = []
+    fig_names = []
+
     for pl in plot_codes:
         # Check if there is "condition" requirement
         if "g" in pl and not is_conditions:
             continue
-            
-        # CRITICAL FIX: sanitize 'all' and use PRIORITY parsing for var_x (Option 2)
-        parse_code = pl
-        if pl.startswith("Ball") or pl.startswith("Jall"):
-            parse_code = pl.replace("all", "")
-
-        # Priority for grouping tokens from Option 2:
-        # prefer 'g' (condition), then 'e' (batch), 'a' (sample), 'b' (cell),
-        # 'c' (direction), 's' (status), 'd' (ilum), 'k' (subbatch)
-        varx_priority = ['g', 'e', 'a', 'b', 'c', 's', 'd', 'k']
-
-        # Determine var_x using priority (instead of arbitrary substring match)
-        var_x = None
-        for key in varx_priority:
-            if key in parse_code:
-                var_x = {"a": "sample", "b": "cell", "c": "direction", "d": "ilum", "e": "batch", "g": "condition", "s": "status", "k": "subbatch"}[key]
-                break
-
-        # Determine var_y normally (single-char JV param code)
-        vary_dict = {"v": "voc", "j": "jsc", "f": "ff", "p": "pce", "u": "vmpp", "i": "jmpp", "m": "pmpp", "r": "rser", "h": "rshu"}
-        var_y = next((vary_dict[key] for key in vary_dict if key in parse_code), None)
-
-        # CRITICAL: Initialize fig and fig_name to None at start of each iteration
-        fig = None
-        fig_name = None
 
         try:
-            # Combined grid for 'all' – now gets correct var_x from Option 2
-            if "Ball" in pl and var_x:
-                fig, fig_name = plot_manager.create_combined_boxplot_grid(
-                    filtered_jv, var_x,
-                    [omitted_jv, filter_pars],
-                    "data", colors=color_scheme,
-                    separate_scan_dir=separate_scan_dir
-                )
-            # Regular boxplots
-            elif "B" in pl and var_x and var_y:
-                fig, fig_name, wb, title_text, subtitle = plot_manager.create_boxplot(
-                    filtered_jv, var_x, var_y,
-                    [omitted_jv, filter_pars],
-                    "data", colors=color_scheme,
-                    separate_scan_dir=separate_scan_dir
-                )
-            elif "Cb" in pl:
-                fig, fig_name = plot_manager.create_jv_best_per_condition_plot(filtered_jv, filtered_curves, colors=color_scheme, condition_order=condition_order)
-                fig = plot_manager.apply_jv_line_width_to_figure(fig)
-            elif "Cw" in pl:
-                fig, fig_name = plot_manager.create_jv_best_device_plot(filtered_jv, filtered_curves, colors=color_scheme)
-                fig = plot_manager.apply_jv_line_width_to_figure(fig)
-            elif "Cy" in pl:
-                fig, fig_name = plot_manager.create_jv_all_cells_plot(complete_jv, filtered_curves, colors=color_scheme)
-                fig = plot_manager.apply_jv_line_width_to_figure(fig)
-            elif "Cz" in pl:
-                working_curves = plot_manager._create_matching_curves_data(filtered_jv, complete_curves)
-                fig, fig_name = plot_manager.create_jv_working_cells_plot(filtered_jv, working_curves, colors=color_scheme)
-                fig = plot_manager.apply_jv_line_width_to_figure(fig)
-            elif "Co" in pl:
-                if not omitted_jv.empty:
-                    rejected_pce_min = omitted_jv['PCE(%)'].min()
-                    rejected_pce_max = omitted_jv['PCE(%)'].max() 
-                    rejected_pce_mean = omitted_jv['PCE(%)'].mean()
-
-                    # Show some example rejected samples
-                    rejected_samples = omitted_jv[['sample', 'cell', 'PCE(%)', 'filter_reason']].head(5)
-                    for _, row in rejected_samples.iterrows():
-                        reason = row.get('filter_reason', 'No reason specified')
-                else:
-                    print(f"  No rejected data available!")
-                
-                # Create filtered curves that match only the omitted JV data
-                rejected_curves = plot_manager._create_matching_curves_data(omitted_jv, complete_curves)
-                
-                print(f"  Rejected curves after filtering: {len(rejected_curves)}")
-                
-                if not rejected_curves.empty:
-                    unique_rejected_devices = rejected_curves.groupby(['sample', 'cell']).size().reset_index()
-                fig, fig_name = plot_manager.create_jv_non_working_cells_plot(omitted_jv, rejected_curves, colors=color_scheme)
-                fig = plot_manager.apply_jv_line_width_to_figure(fig)
-            elif "Cx" in pl:
-                figs, fig_names_temp = plot_manager.create_jv_separated_by_cell_plot(complete_jv, complete_curves, colors=color_scheme)  
-                if isinstance(figs, list) and isinstance(fig_names_temp, list):
-                    figs = [plot_manager.apply_jv_line_width_to_figure(f) for f in figs]
-                    fig_list.extend(figs)
-                    fig_names.extend(fig_names_temp)
-                else:
-                    figs = plot_manager.apply_jv_line_width_to_figure(figs)
-                    fig_list.append(figs)
-                    fig_names.append(fig_names_temp)
-                continue
-            elif "Cd" in pl:
-                figs, fig_names_temp = plot_manager.create_jv_separated_by_substrate_plot(complete_jv, complete_curves, colors=color_scheme, plot_type="all") 
-                if isinstance(figs, list) and isinstance(fig_names_temp, list):
-                    figs = [plot_manager.apply_jv_line_width_to_figure(f) for f in figs]
-                    fig_list.extend(figs)
-                    fig_names.extend(fig_names_temp)
-                else:
-                    figs = plot_manager.apply_jv_line_width_to_figure(figs)
-                    fig_list.append(figs)
-                    fig_names.append(fig_names_temp)
-                continue
-            else:
+            result = None
+            for token, handler in plot_handlers:
+                if token in pl:
+                    result = handler(pl)
+                    if result is not None:
+                        break
+
+            if result is None:
                 print(f"Plot code {pl} not fully implemented yet")
                 continue
 
-            # CRITICAL: Only append if fig was actually created
-            if fig is not None and fig_name is not None:
-                fig_list.append(fig)
-                fig_names.append(fig_name)
-            
+            figs, names = result
+            fig_list.extend(figs)
+            fig_names.extend(names)
+
         except Exception as e:
             print(f"❌ Error creating plot {pl}: {e}")
             import traceback
@@ -208,61 +231,58 @@ def plotting_string_action(plot_list, data, supp, is_voila=False, color_scheme=N
     return fig_list, fig_names
 
 
+# Plot selection -> code tables used by plot_list_from_voila
+JVC_CODES = {
+    'Voc': 'v',
+    'Jsc': 'j',
+    'FF': 'f',
+    'PCE': 'p',
+    'R_ser': 'r',
+    'R_shu': 'h',
+    'V_mpp': 'u',
+    'J_mpp': 'i',
+    'P_mpp': 'm',
+    'all': 'all'  # Maps to combined grid boxplot
+}
+
+BOX_CODES = {
+    'by Batch': 'e',
+    'by Variable': 'g',
+    'by Sample': 'a',
+    'by Cell': 'b',
+    'by Scan Direction': 'c',
+    'by Subbatch': 'k'
+}
+
+CURVE_CODES = {
+    'All cells': 'Cy',
+    'Only working cells': 'Cz',
+    'Rejected cells': 'Co',
+    'Best device only': 'Cw',
+    'Best device per condition': 'Cb',
+    'Separated by cell (all)': 'Cx',
+    'Separated by cell (working only)': 'Cxw',
+    'Separated by substrate (all)': 'Cd',
+    'Separated by substrate (working only)': 'Cdw'
+}
+
+# Plot type -> function building its code from (option1, option2)
+_PLOT_TYPE_CODERS = (
+    ("Boxplot", lambda option1, option2: "B" + JVC_CODES.get(option1, '') + BOX_CODES.get(option2, '')),
+    ("JV Curve", lambda option1, option2: CURVE_CODES.get(option1, '')),
+)
+
 def plot_list_from_voila(plot_list):
     """Convert plot selections from UI to plot codes"""
-    jvc_dict = {
-        'Voc': 'v',
-        'Jsc': 'j',
-        'FF': 'f',
-        'PCE': 'p',
-        'R_ser': 'r',
-        'R_shu': 'h',
-        'V_mpp': 'u',
-        'J_mpp': 'i',
-        'P_mpp': 'm',
-        'all': 'all'  # Maps to combined grid boxplot
-    }
-
-    box_dict = {
-        'by Batch': 'e',
-        'by Variable': 'g',
-        'by Sample': 'a',
-        'by Cell': 'b',
-        'by Scan Direction': 'c',
-        'by Subbatch': 'k'
-    }
-
-    cur_dict = {
-        'All cells': 'Cy',
-        'Only working cells': 'Cz',
-        'Rejected cells': 'Co',
-        'Best device only': 'Cw',
-        'Best device per condition': 'Cb',
-        'Separated by cell (all)': 'Cx',
-        'Separated by cell (working only)': 'Cxw',
-        'Separated by substrate (all)': 'Cd',
-        'Separated by substrate (working only)': 'Cdw'
-    }
-
     new_list = []
-    for plot in plot_list:
-        code = ''
-        plot_type, option1, option2 = plot
-
-        if "Boxplot" in plot_type:
-            code += "B"
-            param_code = jvc_dict.get(option1, '')
-            code += param_code
-            if param_code != 'all':
-                code += box_dict.get(option2, '')
-            else:
-                code += box_dict.get(option2, '')
-        elif "JV Curve" in plot_type:
-            code += cur_dict.get(option1, '')
-        
+    for plot_type, option1, option2 in plot_list:
+        coder = next((c for name, c in _PLOT_TYPE_CODERS if name in plot_type), None)
+        if coder is None:
+            continue
+        code = coder(option1, option2)
         if code:
             new_list.append(code)
-            
+
     return new_list
 
 class PlotManager:
@@ -341,7 +361,9 @@ class PlotManager:
         if colors is None:
             colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
 
-        fig = go.Figure()
+        # Collect traces and draw the axis lines once, to the widest device's Voc
+        traces = []
+        axis_x_max = None
         unique_pairs = data[['sample', 'cell']].drop_duplicates()
         for idx, (_, pair_row) in enumerate(unique_pairs.iterrows()):
             sample = pair_row['sample']
@@ -354,8 +376,8 @@ class PlotManager:
 
             max_voc = group_data['Voc(V)'].max() if 'Voc(V)' in group_data.columns else 1.2
             x_max = (math.ceil(max_voc * 10) / 10) + 0.1
-            fig.add_shape(type="line", x0=-0.2, y0=0, x1=x_max, y1=0, line=dict(color="gray", width=2))
-            fig.add_shape(type="line", x0=0, y0=-5, x1=0, y1=25, line=dict(color="gray", width=2))
+            if axis_x_max is None or x_max > axis_x_max:
+                axis_x_max = x_max
 
             for row_idx in voltage_data.index.intersection(current_data.index):
                 voltage_values = voltage_data.loc[row_idx, voltage_data.columns[8:]].values
@@ -368,7 +390,7 @@ class PlotManager:
                     continue
 
                 base_color = colors[idx % len(colors)]
-                fig.add_trace(go.Scatter(
+                traces.append(go.Scatter(
                     x=voltage_values,
                     y=current_values,
                     mode='lines+markers',
@@ -379,8 +401,17 @@ class PlotManager:
                     showlegend=True
                 ))
 
+        shapes = []
+        if axis_x_max is not None:
+            shapes = [
+                dict(type="line", x0=-0.2, y0=0, x1=axis_x_max, y1=0, line=dict(color="gray", width=2)),
+                dict(type="line", x0=0, y0=-5, x1=0, y1=25, line=dict(color="gray", width=2)),
+            ]
+
         title_suffix = "All Cells" if plot_mode == "all" else ("Working Cells Only" if plot_mode == "working" else "Non-Working Cells Only")
+        fig = go.Figure(data=traces)
         fig.update_layout(
+            shapes=shapes,
             title=f"JV Curves - {title_suffix}",
             xaxis_title='Voltage [V]',
             yaxis_title='Current Density [mA/cm²]',
@@ -441,17 +472,6 @@ class PlotManager:
 
         return v.tolist(), c.tolist()
 
-    def _extract_rgb_from_color(self, color_string):
-        """Extract RGB values from color string"""
-        if 'rgba(' in color_string:
-            rgba_values = color_string.replace('rgba(', '').replace(')', '').split(',')
-            return int(rgba_values[0]), int(rgba_values[1]), int(rgba_values[2]), float(rgba_values[3])
-        elif color_string.startswith('#'):
-            hex_color = color_string.lstrip('#')
-            if len(hex_color) == 6:
-                return int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16), 0.7
-        return 93, 164, 214, 0.7  # Default fallback
-
     def _create_matching_curves_data(self, jv_data, curves_data):
         """Create curves data that matches specific JV measurements EXACTLY including status"""
         if jv_data.empty:
@@ -462,94 +482,49 @@ class PlotManager:
         has_status_curves = 'status' in curves_data.columns
         
         # Use sample_id for precise matching if available
-        if 'sample_id' in jv_data.columns and 'sample_id' in curves_data.columns:
+        use_sample_id = 'sample_id' in jv_data.columns and 'sample_id' in curves_data.columns
+        if use_sample_id:
             print(f"  Using sample_id for precise matching")
-            
-            # Create set of exact measurement combinations from JV data
-            jv_combinations = set()
-            duplicate_combinations = []
-        
-            for _, row in jv_data.iterrows():
-                if has_status_jv and has_status_curves:
-                    # Use 5-field matching including status
-                    combination = (row['sample_id'], row['cell'], row['direction'], row['ilum'], row['status'])
-                else:
-                    # Use 4-field matching without status
-                    combination = (row['sample_id'], row['cell'], row['direction'], row['ilum'])
-                    
-                if combination in jv_combinations:
-                    duplicate_combinations.append(combination)
-                jv_combinations.add(combination)
-        
-            print(f"  JV combinations to match: {len(jv_combinations)}")
-            print(f"  Total JV records: {len(jv_data)}")
-            print(f"  Duplicate combinations found: {len(duplicate_combinations)}")
-        
-            if len(duplicate_combinations) > 0:
-                print(f"  Example duplicates: {duplicate_combinations[:3]}")
-                # Show what makes these records different
-                example_dup = duplicate_combinations[0] if duplicate_combinations else None
-                if example_dup:
-                    if has_status_jv and has_status_curves:
-                        sample_id, cell, direction, ilum, status = example_dup
-                        matching_records = jv_data[
-                            (jv_data['sample_id'] == sample_id) & 
-                            (jv_data['cell'] == cell) & 
-                            (jv_data['direction'] == direction) & 
-                            (jv_data['ilum'] == ilum) &
-                            (jv_data['status'] == status)
-                        ]
-                    else:
-                        sample_id, cell, direction, ilum = example_dup
-                        matching_records = jv_data[
-                            (jv_data['sample_id'] == sample_id) & 
-                            (jv_data['cell'] == cell) & 
-                            (jv_data['direction'] == direction) & 
-                            (jv_data['ilum'] == ilum)
-                        ]
-                    print(f"  Records with same combination:")
-                    for _, record in matching_records.iterrows():
-                        print(f"    PCE: {record['PCE(%)']:.2f}%, Status: {record.get('status', 'N/A')}")
-            
-            # Filter curves using exact matching
-            def should_include_curve(curve_row):
-                if has_status_jv and has_status_curves:
-                    combination = (curve_row['sample_id'], curve_row['cell'], curve_row['direction'], curve_row['ilum'], curve_row['status'])
-                else:
-                    combination = (curve_row['sample_id'], curve_row['cell'], curve_row['direction'], curve_row['ilum'])
-                return combination in jv_combinations
-            
-            matching_curves = curves_data[curves_data.apply(should_include_curve, axis=1)].copy()
-            
+            key_cols = ['sample_id', 'cell', 'direction', 'ilum']
+            if has_status_jv and has_status_curves:
+                # Use 5-field matching including status
+                key_cols.append('status')
         else:
             # Fallback to sample name matching
             print(f"  Using sample name matching (fallback)")
+            key_cols = ['sample', 'cell', 'direction', 'ilum']
+        
+        # Exact measurement combinations from JV data
+        duplicated = jv_data.duplicated(subset=key_cols)
+        jv_keys = jv_data.loc[~duplicated, key_cols]
+        
+        if use_sample_id:
+            print(f"  JV combinations to match: {len(jv_keys)}")
+            print(f"  Total JV records: {len(jv_data)}")
+            print(f"  Duplicate combinations found: {int(duplicated.sum())}")
             
-            jv_combinations = set()
-            for _, row in jv_data.iterrows():
-                combination = (row['sample'], row['cell'], row['direction'], row['ilum'])
-                jv_combinations.add(combination)
-            
-            def should_include_curve(curve_row):
-                combination = (curve_row['sample'], curve_row['cell'], curve_row['direction'], curve_row['ilum'])
-                return combination in jv_combinations
-            
-            matching_curves = curves_data[curves_data.apply(should_include_curve, axis=1)].copy()
+            if duplicated.any():
+                duplicate_examples = list(jv_data.loc[duplicated, key_cols].head(3).itertuples(index=False, name=None))
+                print(f"  Example duplicates: {duplicate_examples}")
+                # Show what makes these records different
+                same_combination = (jv_data[key_cols] == pd.Series(duplicate_examples[0], index=key_cols)).all(axis=1)
+                matching_records = jv_data[same_combination]
+                statuses = matching_records['status'] if has_status_jv else ['N/A'] * len(matching_records)
+                print(f"  Records with same combination:")
+                for pce, status in zip(matching_records['PCE(%)'], statuses):
+                    print(f"    PCE: {pce:.2f}%, Status: {status}")
+        
+        # Filter curves with one hash-based lookup of their key columns in the JV combinations
+        keep = pd.MultiIndex.from_frame(curves_data[key_cols]).isin(pd.MultiIndex.from_frame(jv_keys))
+        matching_curves = curves_data[keep].copy()
         
         print(f"  Matching curve records found: {len(matching_curves)}")
         print(f"  Expected ratio curves/JV: {len(matching_curves)/len(jv_data):.1f}x (should be ~2x)")
         
         # Additional verification: check if we're getting the right samples
         if not matching_curves.empty:
-            unique_curve_devices = set()
-            for _, row in matching_curves.iterrows():
-                device = f"{row['sample']}_{row['cell']}"
-                unique_curve_devices.add(device)
-            
-            unique_jv_devices = set()
-            for _, row in jv_data.iterrows():
-                device = f"{row['sample']}_{row['cell']}"
-                unique_jv_devices.add(device)
+            unique_curve_devices = set(matching_curves['sample'].astype(str) + '_' + matching_curves['cell'].astype(str))
+            unique_jv_devices = set(jv_data['sample'].astype(str) + '_' + jv_data['cell'].astype(str))
             
             print(f"  Unique devices in curves: {len(unique_curve_devices)}")
             print(f"  Unique devices in JV: {len(unique_jv_devices)}")
@@ -579,20 +554,10 @@ class PlotManager:
         
         # Get ALL measurements for this sample+cell combination (not just best measurement)
         best_device_jv = jvc_data[(jvc_data["sample"] == best_sample) & (jvc_data["cell"] == best_cell)]
-        best_device_curves = curves_data[(curves_data["sample"] == best_sample) & (curves_data["cell"] == best_cell)]
-
-        all_matching_curves = curves_data[curves_data["sample"] == best_sample]
-        
-        if len(all_matching_curves) > 0:
-            device_curves = all_matching_curves[all_matching_curves["cell"] == best_cell]
-        
-        # Get ALL measurements for this sample+cell combination (not just best measurement)
-        best_device_jv = jvc_data[(jvc_data["sample"] == best_sample) & (jvc_data["cell"] == best_cell)]
-        best_device_curves = curves_data[(curves_data["sample"] == best_sample) & (curves_data["cell"] == best_cell)]
-
-        if not best_device_curves.empty:
-            voltage_curves = best_device_curves[best_device_curves["variable"] == "Voltage (V)"]
-            current_curves = best_device_curves[best_device_curves["variable"] == "Current Density(mA/cm2)"]
+        try:
+            best_device_curves = curves_data.groupby(["sample", "cell"], sort=False).get_group((best_sample, best_cell))
+        except KeyError:
+            best_device_curves = curves_data.iloc[0:0]
         
         if best_device_curves.empty:
             print(f"No curve data found for best device")
@@ -602,15 +567,18 @@ class PlotManager:
         voltage_curves = best_device_curves[best_device_curves["variable"] == "Voltage (V)"]
         current_curves = best_device_curves[best_device_curves["variable"] == "Current Density(mA/cm2)"]
 
-        fig = go.Figure()
+        # Collect traces and axis shapes; the figure is built once at the end
+        traces = []
         
         # Calculate dynamic axis ranges based on data
         max_voc = jvc_data['Voc(V)'].max() if 'Voc(V)' in jvc_data.columns else 1.2
         x_max = (math.ceil(max_voc * 10) / 10) + 0.1
         
         # Add axis lines with dynamic range
-        fig.add_shape(type="line", x0=-0.2, y0=0, x1=x_max, y1=0, line=dict(color="gray", width=2))
-        fig.add_shape(type="line", x0=0, y0=-5, x1=0, y1=25, line=dict(color="gray", width=2))
+        shapes = [
+            dict(type="line", x0=-0.2, y0=0, x1=x_max, y1=0, line=dict(color="gray", width=2)),
+            dict(type="line", x0=0, y0=-5, x1=0, y1=25, line=dict(color="gray", width=2)),
+        ]
         
         if colors is None:
             colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
@@ -618,19 +586,13 @@ class PlotManager:
         voltage_measurements = {}
         current_measurements = {}
         
-        for idx, curve_row in best_device_curves.iterrows():
-            direction = curve_row['direction']
-            variable_type = curve_row['variable']
-            
-            # Extract the actual data values
-            data_values = []
-            for col in curve_row.index[8:]:
-                try:
-                    val = float(curve_row[col])
-                    if not pd.isna(val):
-                        data_values.append(val)
-                except (ValueError, TypeError):
-                    continue
+        # Parse all curve points in one pass; each row keeps only its non-NaN values
+        curve_values = self._curve_value_matrix(best_device_curves)
+        curve_mask = ~np.isnan(curve_values)
+        
+        for row_pos, (direction, variable_type) in enumerate(
+                zip(best_device_curves['direction'], best_device_curves['variable'])):
+            data_values = curve_values[row_pos][curve_mask[row_pos]].tolist()
 
             # Group by direction
             key = f"{direction}"
@@ -685,8 +647,8 @@ class PlotManager:
         measurement_pairs.sort(key=lambda x: (x['measurement_index'], x['direction']))
         
         # Add axis lines with extended range
-        fig.add_shape(type="line", x0=-2, y0=0, x1=10, y1=0, line=dict(color="gray", width=2))
-        fig.add_shape(type="line", x0=0, y0=-1000, x1=0, y1=300, line=dict(color="gray", width=2))
+        shapes.append(dict(type="line", x0=-2, y0=0, x1=10, y1=0, line=dict(color="gray", width=2)))
+        shapes.append(dict(type="line", x0=0, y0=-1000, x1=0, y1=300, line=dict(color="gray", width=2)))
         
         # Group pairs: each measurement index gets one color, shared between Forward and Reverse
         unique_measurements = {}
@@ -703,7 +665,7 @@ class PlotManager:
             base_color = colors[color_index]
             
             # Extract RGB values from rgba color string
-            r, g, b, alpha = self._extract_rgb_from_color(base_color)
+            r, g, b, alpha = _extract_rgb_from_color(base_color)
             
             # Plot both reverse and forward for this measurement
             for pair in pairs:
@@ -733,7 +695,7 @@ class PlotManager:
                     # Create trace name
                     trace_name = f"{direction} #{measurement_idx + 1}"
                     
-                    fig.add_trace(go.Scatter(
+                    traces.append(go.Scatter(
                         x=voltage_values,
                         y=current_values,
                         mode='lines+markers',
@@ -760,7 +722,9 @@ class PlotManager:
         legend_y_position = base_y_position + additional_y_offset
         
         # Update layout
+        fig = go.Figure(data=traces)
         fig.update_layout(
+            shapes=shapes,
             title=dict(text=f"JV Curves - Best Device ({best_sample} [Cell {best_cell}])", font=dict(size=self.font_size_title)),
             xaxis_title='Voltage [V]',
             yaxis_title='Current Density [mA/cm²]',
@@ -804,31 +768,42 @@ class PlotManager:
         else:
             grouping_col = 'condition'
         
-        fig = go.Figure()
+        # Collect traces and axis shapes; the figure is built once at the end
+        traces = []
         
         # Calculate dynamic axis ranges based on data
         max_voc = jvc_data['Voc(V)'].max() if 'Voc(V)' in jvc_data.columns else 1.2
         x_max = (math.ceil(max_voc * 10) / 10) + 0.1
         
         # Add axis lines with dynamic range
-        fig.add_shape(type="line", x0=-0.2, y0=0, x1=x_max, y1=0, line=dict(color="gray", width=2))
-        fig.add_shape(type="line", x0=0, y0=-5, x1=0, y1=25, line=dict(color="gray", width=2))
+        shapes = [
+            dict(type="line", x0=-0.2, y0=0, x1=x_max, y1=0, line=dict(color="gray", width=2)),
+            dict(type="line", x0=0, y0=-5, x1=0, y1=25, line=dict(color="gray", width=2)),
+        ]
         
         if colors is None:
             colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
         
         # CRITICAL CHANGE: Get only the SINGLE best measurement per condition (not per sample+condition)
         # This will automatically pick the best direction (Forward or Reverse)
-        best_per_condition = jvc_data.loc[jvc_data.groupby(grouping_col)['PCE(%)'].idxmax()]
+        # Highest PCE first, then the first row per condition; rows without a PCE or
+        # condition are skipped as groupby/idxmax did, and conditions stay in key order
+        best_per_condition = (
+            jvc_data.dropna(subset=['PCE(%)', grouping_col])
+            .sort_values('PCE(%)', ascending=False, kind='stable')
+            .drop_duplicates(subset=[grouping_col], keep='first')
+            .sort_values(grouping_col, kind='stable')
+        )
         
         # Apply condition_order so color assignment matches boxplot order
         if condition_order:
-            present_conditions = set(best_per_condition[grouping_col].unique())
-            ordered = [c for c in condition_order if c in present_conditions]
-            # Append any conditions not covered by condition_order (safety)
-            for c in best_per_condition[grouping_col].unique():
-                if c not in set(ordered):
-                    ordered.append(c)
+            present = best_per_condition[grouping_col].unique()
+            present_conditions = set(present)
+            # Requested order first, then any conditions not covered by condition_order (safety);
+            # dict.fromkeys keeps the first occurrence of each
+            ordered = list(dict.fromkeys(
+                [c for c in condition_order if c in present_conditions] + list(present)
+            ))
             if ordered:
                 cat_type = pd.CategoricalDtype(categories=ordered, ordered=True)
                 best_per_condition = best_per_condition.copy()
@@ -858,18 +833,20 @@ class PlotManager:
         print(f"   Required bottom margin: {required_bottom_margin}px")
         print(f"   Legend y position: {legend_y_position}")
         
-        for i, (_, best_row) in enumerate(best_per_condition.iterrows()):
+        # Key the curve table once; each best row is then a dict lookup
+        curve_key_index = self._index_curves_by_measurement_key(curves_data)
+        
+        best_rows = best_per_condition.reset_index(drop=True)
+        for i, best_row in enumerate(best_rows.to_dict('records')):
             sample = best_row['sample']
             cell = best_row['cell']
             condition = best_row.get(grouping_col, 'Unknown')
             pce = best_row['PCE(%)']
             direction = best_row['direction']  # ADD: Get the direction of the best measurement
-            sample_id = best_row['sample_id']
-            ilum = best_row['ilum']
             
             print(f"  • {condition}: {sample}_{cell} ({direction}, PCE: {pce:.2f}%)")
             
-            device_curves = self._select_best_curve_rows_for_jv_row(best_row, curves_data)
+            device_curves = self._select_best_curve_rows_for_jv_row(best_row, curves_data, curve_key_index)
             
             if device_curves.empty:
                 print(f"    Warning: No curves found for {condition}")
@@ -879,19 +856,12 @@ class PlotManager:
             voltage_measurements = {}
             current_measurements = {}
             
-            for _, curve_row in device_curves.iterrows():
-                curve_direction = curve_row['direction']
-                variable_type = curve_row['variable']
-                
-                # Extract data values
-                data_values = []
-                for col in curve_row.index[8:]:
-                    try:
-                        val = float(curve_row[col])
-                        if not pd.isna(val):
-                            data_values.append(val)
-                    except (ValueError, TypeError):
-                        continue
+            curve_values = self._curve_value_matrix(device_curves)
+            curve_mask = ~np.isnan(curve_values)
+            
+            for row_pos, (curve_direction, variable_type) in enumerate(
+                    zip(device_curves['direction'], device_curves['variable'])):
+                data_values = curve_values[row_pos][curve_mask[row_pos]].tolist()
                 
                 key = f"{curve_direction}"
                 
@@ -902,7 +872,7 @@ class PlotManager:
             
             # Plot curves for this measurement (should be only one direction now)
             base_color = colors[i % len(colors)]
-            r, g, b, alpha = self._extract_rgb_from_color(base_color)
+            r, g, b, alpha = _extract_rgb_from_color(base_color)
             
             for key in voltage_measurements.keys():
                 if key in current_measurements:
@@ -923,7 +893,7 @@ class PlotManager:
                         # CHANGE: Updated trace name to show which direction won
                         trace_name = f"{condition} ({curve_direction}, {pce:.1f}%)"
                         
-                        fig.add_trace(go.Scatter(
+                        traces.append(go.Scatter(
                             x=voltage_values,
                             y=current_values,
                             mode='lines+markers',
@@ -935,7 +905,9 @@ class PlotManager:
                         ))
         
         # Update layout with DRAGGABLE legend
+        fig = go.Figure(data=traces)
         fig.update_layout(
+            shapes=shapes,
             title=dict(text=f"JV Curves - Best Measurement per {grouping_col.title()}", font=dict(size=self.font_size_title)),
             xaxis_title='Voltage [V]',
             yaxis_title='Current Density [mA/cm²]',
@@ -963,6 +935,12 @@ class PlotManager:
         
         return fig, "JV_best_per_condition.html"
 
+    def _curve_value_matrix(self, curve_rows):
+        """Return the curve point columns as a float array, with unparseable cells as NaN."""
+        return (curve_rows.iloc[:, 8:]
+                .apply(pd.to_numeric, errors='coerce')
+                .to_numpy(dtype=np.float64, na_value=np.nan))
+
     def _extract_curve_data_values(self, curve_row):
         """Extract numeric curve points from a curve row."""
         data_values = []
@@ -1024,30 +1002,45 @@ class PlotManager:
             cycle_number
         )
 
-    def _select_best_curve_rows_for_jv_row(self, best_row, curves_data):
-        """Select curve rows that best match one JV summary row."""
+    def _index_curves_by_measurement_key(self, curves_data):
+        """Map each measurement key to the positional rows of curves_data carrying it."""
+        if curves_data is None or curves_data.empty:
+            return {}
+        # Only the metadata columns feed the key; missing ones come back as NaN
+        key_rows = curves_data.reindex(
+            columns=['sample_id', 'sample', 'cell', 'direction', 'ilum', 'px_number', 'cycle_number']
+        ).to_dict('records')
+        key_index = {}
+        for pos, row in enumerate(key_rows):
+            key_index.setdefault(self._build_measurement_key(row), []).append(pos)
+        return key_index
+
+    def _select_best_curve_rows_for_jv_row(self, best_row, curves_data, curve_key_index=None):
+        """Select curve rows that best match one JV summary row.
+
+        Pass ``curve_key_index`` from ``_index_curves_by_measurement_key`` when
+        matching many rows against the same curves table.
+        """
         if curves_data is None or curves_data.empty:
             return pd.DataFrame()
 
+        if curve_key_index is None:
+            curve_key_index = self._index_curves_by_measurement_key(curves_data)
+
         target_key = self._build_measurement_key(best_row)
         target_sample = target_key[0]
         target_cell = target_key[1]
 
-        keyed_curves = curves_data.copy()
-        keyed_curves['_match_key'] = keyed_curves.apply(self._build_measurement_key, axis=1)
+        if target_key in curve_key_index:
+            return curves_data.iloc[curve_key_index[target_key]]
 
-        exact = keyed_curves[keyed_curves['_match_key'] == target_key]
-        if not exact.empty:
-            return exact.drop(columns=['_match_key'])
-
-        scoped = keyed_curves[
-            keyed_curves['_match_key'].apply(lambda k: k[0] == target_sample and k[1] == target_cell)
+        candidate_keys = [
+            k for k in curve_key_index
+            if k[0] == target_sample and k[1] == target_cell
         ]
-        if scoped.empty:
+        if not candidate_keys:
             return pd.DataFrame()
 
-        candidate_keys = scoped['_match_key'].drop_duplicates().tolist()
-
         def _score_key(candidate_key):
             score = 0
             for idx, weight in ((2, 4), (3, 3), (4, 2), (5, 2)):
@@ -1060,7 +1053,7 @@ class PlotManager:
             return (score, non_null_meta)
 
         best_key = max(candidate_keys, key=lambda k: (_score_key(k), str(k)))
-        return scoped[scoped['_match_key'] == best_key].drop(columns=['_match_key'])
+        return curves_data.iloc[curve_key_index[best_key]]
 
     def _split_batch_sample_label(self, value):
         """Split a label at the last underscore into batch and sample parts."""
@@ -1889,14 +1882,14 @@ class PlotManager:
         return fig, fig_name, None, title_text, ""
     
     def _lighten_rgba(self, rgba_str, factor=0.3):
-        r, g, b, a = self._extract_rgb_from_color(rgba_str)
+        r, g, b, a = _extract_rgb_from_color(rgba_str)
         r = min(255, int(r + (255 - r) * factor))
         g = min(255, int(g + (255 - g) * factor))
         b = min(255, int(b + (255 - b) * factor))
         return f'rgba({r}, {g}, {b}, {a})'
 
     def _darken_rgba(self, rgba_str, factor=0.3):
-        r, g, b, a = self._extract_rgb_from_color(rgba_str)
+        r, g, b, a = _extract_rgb_from_color(rgba_str)
         r = max(0, int(r * (1 - factor)))
         g = max(0, int(g * (1 - factor)))
         b = max(0, int(b * (1 - factor)))
@@ -12,6 +12,8 @@ import plotly.utils
 from IPython.display import HTML, display
 import json
 import uuid
+import hashlib
+import weakref
 import ipywidgets as widgets
 
 
@@ -37,9 +39,13 @@ class ResizablePlotWidget:
             safe = str(title).replace(' ', '_').replace('/', '_').replace('\\', '_')
             safe = ''.join(c for c in safe if c.isalnum() or c in '_-')
             self.filename_base = safe[:60] if safe else 'jv_plot'
+        self._fig_json = None
+    
+    def get_figure_json(self):
+        """Apply the display layout and return the figure JSON (computed once)"""
+        if self._fig_json is not None:
+            return self._fig_json
         
-    def display(self):
-        """Display the resizable plot with external title"""
         # CRITICAL FIX: Update figure layout AND make legend draggable
         self.fig.update_layout(
             autosize=True,
@@ -59,7 +65,19 @@ class ResizablePlotWidget:
         )
         
         # Convert figure to JSON
-        fig_json = json.dumps(self.fig, cls=plotly.utils.PlotlyJSONEncoder)
+        self._fig_json = json.dumps(self.fig, cls=plotly.utils.PlotlyJSONEncoder)
+        return self._fig_json
+    
+    def render_signature(self, legend_table=False):
+        """Hash of everything that ends up in the rendered output"""
+        key = json.dumps([self.get_figure_json(), self.title, self.subtitle,
+                          self.initial_width, self.initial_height, self.filename_base,
+                          bool(legend_table)])
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+        
+    def display(self):
+        """Display the resizable plot with external title"""
+        fig_json = self.get_figure_json()
         
         # CRITICAL: Create title HTML OUTSIDE the plot container
         title_html = f'<h3 style="margin: 20px 0 5px 0; color: #2c3e50;">{self.title}</h3>'
@@ -445,6 +463,11 @@ def display_resizable_plot(fig, title="Plot", width=800, height=600, subtitle=No
 class ResizablePlotManager:
     """Enhanced plot manager that creates resizable plots"""
     
+    # Per-container plot slots: {(name, occurrence): (render signature, Output widget)}
+    _slots_by_container = weakref.WeakKeyDictionary()
+    # Last VBox displayed in each container, closed when it is replaced
+    _box_by_container = weakref.WeakKeyDictionary()
+    
     @staticmethod
     def display_plots_resizable(figs, names, titles=None, subtitles=None, container_widget=None, jv_legend_table=False):
         """
@@ -455,13 +478,22 @@ class ResizablePlotManager:
             names: List of plot filenames
             titles: Optional list of display titles (if None, uses names)
             subtitles: Optional list of subtitles
-            container_widget: Optional widget container for output
+            container_widget: Optional widget container for output. Plots shown in
+                              a container are kept in per-plot output slots, and
+                              unchanged plots reuse their slot on the next call.
             jv_legend_table: If True, hide in-figure legend for JV curve plots
                              and display it as a table below the plot instead
         """
         if container_widget:
+            slots = ResizablePlotManager._slots_by_container.setdefault(container_widget, {})
             with container_widget:
-                ResizablePlotManager._display_plots_internal(figs, names, titles, subtitles, jv_legend_table)
+                box = ResizablePlotManager._display_plots_internal(figs, names, titles, subtitles, jv_legend_table, slots)
+            previous_box = ResizablePlotManager._box_by_container.pop(container_widget, None)
+            if previous_box is not None:
+                # Closing a Box leaves its children open, so reused slots survive
+                previous_box.close()
+            if box is not None:
+                ResizablePlotManager._box_by_container[container_widget] = box
         else:
             ResizablePlotManager._display_plots_internal(figs, names, titles, subtitles, jv_legend_table)
     @staticmethod
@@ -510,8 +542,15 @@ class ResizablePlotManager:
         )
 
     @staticmethod
-    def _display_plots_internal(figs, names, titles=None, subtitles=None, jv_legend_table=False):
-        """Internal method to display plots"""
+    def _display_plots_internal(figs, names, titles=None, subtitles=None, jv_legend_table=False, slots=None):
+        """Internal method to display plots.
+        
+        With a slots dict, each plot is rendered into its own Output widget and
+        plots whose rendered content did not change keep their existing widget,
+        so their payload is not sent to the browser again. Slots that are not
+        reused are closed. Returns the VBox holding the slots, or None without
+        a slots dict.
+        """
         from IPython.display import clear_output
         clear_output(wait=True)
         
@@ -519,6 +558,9 @@ class ResizablePlotManager:
         print("💡 Drag the bottom-right corner of each plot to resize")
         print()
         
+        outputs = []
+        new_slots = {}
+        name_counts = {}
         for i, (fig, name) in enumerate(zip(figs, names)):
             try:
                 # Use provided title or fall back to name
@@ -539,14 +581,29 @@ class ResizablePlotManager:
                 else:
                     width, height = 800, 600
                 
-                # Create and display resizable plot WITH TITLE, SUBTITLE AND FILENAME
-                display_resizable_plot(fig, display_title, width, height, subtitle, filename=name)
-
-                # For JV Curve Analysis tab: display legend as a table below the plot
-                if is_jv_curve and jv_legend_table:
-                    legend_html = ResizablePlotManager._build_jv_legend_table(fig)
-                    if legend_html:
-                        display(HTML(legend_html))
+                # Create resizable plot WITH TITLE, SUBTITLE AND FILENAME
+                plot = create_resizable_plot(fig, display_title, width, height, subtitle, filename=name)
+                
+                legend_table = is_jv_curve and jv_legend_table
+                if slots is None:
+                    ResizablePlotManager._render_plot(plot, legend_table)
+                    continue
+                
+                # Repeated names get their own slot so no Output goes untracked
+                occurrence = name_counts.get(name, 0)
+                name_counts[name] = occurrence + 1
+                slot_key = (name, occurrence)
+                
+                signature = plot.render_signature(legend_table)
+                cached = slots.get(slot_key)
+                if cached and cached[0] == signature:
+                    output = cached[1]
+                else:
+                    output = widgets.Output()
+                    with output:
+                        ResizablePlotManager._render_plot(plot, legend_table)
+                new_slots[slot_key] = (signature, output)
+                outputs.append(output)
                 
             except Exception as e:
                 print(f"❌ Error displaying plot {i+1} ({name}): {e}")
@@ -559,6 +616,31 @@ class ResizablePlotManager:
                         display(fig)
                 except Exception as e2:
                     print(f"❌ Could not display plot {name}: {e2}")
+        
+        if slots is None:
+            return None
+        
+        # Close evicted or re-rendered Outputs so the widget registry drops their payload
+        for slot_key, (_, output) in slots.items():
+            kept = new_slots.get(slot_key)
+            if kept is None or kept[1] is not output:
+                output.close()
+        slots.clear()
+        slots.update(new_slots)
+        box = widgets.VBox(outputs)
+        display(box)
+        return box
+    
+    @staticmethod
+    def _render_plot(plot, legend_table=False):
+        """Display one resizable plot, optionally followed by its legend table"""
+        plot.display()
+
+        # For JV Curve Analysis tab: display legend as a table below the plot
+        if legend_table:
+            legend_html = ResizablePlotManager._build_jv_legend_table(plot.fig)
+            if legend_html:
+                display(HTML(legend_html))
 
 
 # Example usage and test function
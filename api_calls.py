@@ -4,6 +4,18 @@
 import requests
 import getpass
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def response_json(response):
+    """Decode a JSON response body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
 def init_cache():
     import requests_cache
     requests_cache.install_cache("my_local_cache", allowable_methods=('GET', 'POST'), ignored_parameters=['Authorization'])
@@ -84,7 +96,7 @@ def get_token(url, name=None):
     
     return response.json()['access_token']
 
-def get_batch_ids(url, token, batch_type="peroTF_Batch"):
+def get_batch_ids(url, token, batch_type="peroTF_Batch", session=None):
     query = {
         'required': {
             'data': '*'
@@ -95,13 +107,13 @@ def get_batch_ids(url, token, batch_type="peroTF_Batch"):
             'page_size': 10000
         }
     }
-    response = requests.post(
+    response = (session or requests).post(
         f'{url}/entries/archive/query', headers={'Authorization': f'Bearer {token}'}, json=query)
     response.raise_for_status()
-    data = response.json()["data"]
+    data = response_json(response)["data"]
     return [d["archive"]["data"]["lab_id"] for d in data if "lab_id" in d["archive"]["data"]]
 
-def get_ids_in_batch(url, token,batch_ids, batch_type="peroTF_Batch"):
+def get_ids_in_batch(url, token,batch_ids, batch_type="peroTF_Batch", session=None):
     query = {
         'required': {
             'data': '*'
@@ -112,10 +124,10 @@ def get_ids_in_batch(url, token,batch_ids, batch_type="peroTF_Batch"):
             'page_size': 100
         }
     }
-    response = requests.post(
+    response = (session or requests).post(
         f'{url}/entries/archive/query', headers={'Authorization': f'Bearer {token}'}, json=query)
     response.raise_for_status()
-    data = response.json()["data"]
+    data = response_json(response)["data"]
     assert len(data) == len(batch_ids)
     sample_ids = []
     for d in data:
@@ -174,7 +186,7 @@ def get_entry_data(url, token, entry_id):
     assert len(response.json()["data"]) ==1, "Entry not found"
     return response.json()["data"][0]["archive"]["data"]
 
-def get_sample_description(url, token, sample_ids):
+def get_sample_description(url, token, sample_ids, session=None):
     query = {
         'required': {
             'data': '*'
@@ -185,10 +197,10 @@ def get_sample_description(url, token, sample_ids):
             'page_size': 10000
         }
     }
-    response = requests.post(
+    response = (session or requests).post(
         f'{url}/entries/query', headers={'Authorization': f'Bearer {token}'}, json=query)
     response.raise_for_status()
-    entries = response.json()["data"]
+    entries = response_json(response)["data"]
     res = {}
     for entry in entries:
         data = entry["data"]
@@ -313,7 +325,7 @@ def get_specific_data_of_sample(url, token, sample_id, entry_type, with_meta=Fal
             res.append(ldata["archive"]["data"])
     return res
 
-def get_all_JV(url, token, sample_ids, jv_type="peroTF_JVmeasurement"):
+def get_all_JV(url, token, sample_ids, jv_type="peroTF_JVmeasurement", session=None):
     '''
     # collect the results of the sample, in this case it are all the annealing temperatures
     def process_jv_with_metadata(jv_data_with_metadata):
@@ -346,11 +358,11 @@ def get_all_JV(url, token, sample_ids, jv_type="peroTF_JVmeasurement"):
             'page_size': 10000
         }
     }
-    response = requests.post(
+    response = (session or requests).post(
         f'{url}/entries/query', headers={'Authorization': f'Bearer {token}'}, json=query)
     response.raise_for_status()
     
-    entry_ids = [entry["entry_id"] for entry in response.json()["data"]]
+    entry_ids = [entry["entry_id"] for entry in response_json(response)["data"]]
     
     query = {
         'required': {
@@ -364,10 +376,10 @@ def get_all_JV(url, token, sample_ids, jv_type="peroTF_JVmeasurement"):
             'page_size': 10000
         }
     }
-    response = requests.post(f'{url}/entries/archive/query',
+    response = (session or requests).post(f'{url}/entries/archive/query',
                              headers={'Authorization': f'Bearer {token}'}, json=query)
     response.raise_for_status()
-    linked_data = response.json()["data"]
+    linked_data = response_json(response)["data"]
     res = {}
     for ldata in linked_data:
         lab_id = ldata["archive"]["data"]["samples"][0]["lab_id"]
@@ -376,7 +388,7 @@ def get_all_JV(url, token, sample_ids, jv_type="peroTF_JVmeasurement"):
         res[lab_id].append((ldata["archive"]["data"],ldata["archive"]["metadata"]))
     return res
 
-def get_all_measurements_except_JV(url, token, sample_ids):
+def get_all_measurements_except_JV(url, token, sample_ids, session=None):
     # collect the results of the sample, in this case it are all the annealing temperatures
     query = {
         'required': {
@@ -388,11 +400,11 @@ def get_all_measurements_except_JV(url, token, sample_ids):
             'page_size': 10000
         }
     }
-    response = requests.post(
+    response = (session or requests).post(
         f'{url}/entries/query', headers={'Authorization': f'Bearer {token}'}, json=query)
     response.raise_for_status()
     
-    entry_ids = [entry["entry_id"] for entry in response.json()["data"]]
+    entry_ids = [entry["entry_id"] for entry in response_json(response)["data"]]
     
     query = {
         'required': {
@@ -406,10 +418,18 @@ def get_all_measurements_except_JV(url, token, sample_ids):
             'page_size': 10000
         }
     }
-    response = requests.post(f'{url}/entries/archive/query',
-                             headers={'Authorization': f'Bearer {token}'}, json=query)
-    response.raise_for_status()
-    linked_data = response.json()["data"]
+    # all sample entries go into one query; only follow up if the result is paginated
+    linked_data = []
+    while True:
+        response = (session or requests).post(f'{url}/entries/archive/query',
+                                 headers={'Authorization': f'Bearer {token}'}, json=query)
+        response.raise_for_status()
+        page = response_json(response)
+        linked_data.extend(page["data"])
+        next_page = page.get("pagination", {}).get("next_page_after_value")
+        if not next_page:
+            break
+        query['pagination']['page_after_value'] = next_page
     res = {}
     for ldata in linked_data:
         if "entry_type" not in ldata["archive"]["metadata"] or "JV" in ldata["archive"]["metadata"]["entry_type"]:
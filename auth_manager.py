@@ -1,4 +1,5 @@
 import requests
+from requests.adapters import HTTPAdapter
 import os
 import json
 
@@ -105,6 +106,17 @@ class AuthenticationManager:
         self.current_user_info = None
         # Create API client instance for this auth manager
         self.api_client = APIClient(url_base, api_endpoint)
+        self._session = None
+    
+    @property
+    def session(self):
+        """Shared requests session so auth calls reuse one kept-alive connection"""
+        if self._session is None:
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+        return self._session
     
     def set_status_callback(self, callback):
         """Set callback function to update UI status"""
@@ -124,7 +136,7 @@ class AuthenticationManager:
         token_url = self.api_client.get_auth_token_url()
         
         try:
-            response = requests.get(token_url, params=auth_dict, timeout=LAYOUT['TIMEOUT_STANDARD'])
+            response = self.session.get(token_url, params=auth_dict, timeout=LAYOUT['TIMEOUT_STANDARD'])
             response.raise_for_status()
             
             token_data = response.json()
@@ -155,23 +167,33 @@ class AuthenticationManager:
         self.current_token = token
         return self.current_token
     
-    def verify_token(self):
-        """Verify the current token and get user info"""
-        if not self.current_token:
+    def verify_token(self, token=None, report=True):
+        """Verify a token (default: the current one) and get user info.
+        
+        With report=False only the request is made: current_user_info is left
+        alone and errors are raised without a status update, so the call is
+        safe from a worker thread.
+        """
+        if token is None:
+            token = self.current_token
+        if not token:
             raise ValueError("No token available for verification.")
         
         verify_url = self.api_client.get_user_verification_url()
-        headers = {'Authorization': f'Bearer {self.current_token}'}
+        headers = {'Authorization': f'Bearer {token}'}
         
         try:
-            verify_response = requests.get(verify_url, headers=headers, timeout=LAYOUT['TIMEOUT_STANDARD'])
+            verify_response = self.session.get(verify_url, headers=headers, timeout=LAYOUT['TIMEOUT_STANDARD'])
             verify_response.raise_for_status()
             
-            self.current_user_info = verify_response.json()
-            return self.current_user_info
+            user_info = verify_response.json()
+            if report:
+                self.current_user_info = user_info
+            return user_info
             
         except requests.exceptions.RequestException as e:
-            self._handle_request_error(e)
+            if report:
+                self._handle_request_error(e)
             raise
     
     def _handle_request_error(self, e):
@@ -2,13 +2,26 @@
 Shared authentication UI for NOMAD-based notebooks and voila apps.
 """
 
+import asyncio
+import hashlib
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 import ipywidgets as widgets
 
 from plotting_utils import WidgetFactory
 
 
+# Verified user info per token hash, so repeated auth clicks skip the /users/me round-trip
+TOKEN_CACHE_TTL = 60  # seconds
+_verified_tokens = {}  # sha256(token)[:32] -> (monotonic timestamp, user info)
+
+# Token verification runs off the kernel's event loop so the UI stays responsive
+_verify_pool = ThreadPoolExecutor(max_workers=2)
+
+
 class AuthenticationUI:
     """Handles authentication-related UI components on top of AuthenticationManager."""
 
@@ -109,36 +122,105 @@ class AuthenticationUI:
             else:
                 self.auth_manager.authenticate_with_token()
 
-            user_info = self.auth_manager.verify_token()
-            user_display = user_info.get("name", user_info.get("username", "Unknown User"))
-            self._update_status(f"Status: Authenticated as {user_display} on SE Oasis.", "green")
+            user_info = self._cached_user_info()
+            if user_info is not None:
+                self._finish_authentication(user_info)
+                return
+
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            token = self.auth_manager.current_token
+            if loop is None:
+                user_info = self._verify_and_cache(token)
+                self.auth_manager.current_user_info = user_info
+                self._finish_authentication(user_info)
+                return
+
+            # Verify in the background and hand the result back to the kernel loop
+            future = _verify_pool.submit(self._verify_and_cache, token)
+            future.add_done_callback(
+                lambda done: loop.call_soon_threadsafe(self._on_verify_done, done, token)
+            )
 
-            if self.success_callback:
-                self.success_callback()
+        except Exception as exc:
+            self._handle_auth_error(exc)
 
+    def _on_verify_done(self, future, token):
+        if token != self.auth_manager.current_token:
+            return  # a newer authentication attempt (or a logout) superseded this one
+        try:
+            user_info = future.result()
+            self.auth_manager.current_user_info = user_info
+            self._finish_authentication(user_info)
         except Exception as exc:
-            if isinstance(exc, ValueError):
-                self._update_status(f"Status: Error - {exc}", "red")
-            elif isinstance(exc, requests.exceptions.RequestException):
-                error_message = f"Network/API Error: {exc}"
-                if exc.response is not None:
-                    try:
-                        error_detail = exc.response.json().get("detail", exc.response.text)
-                        if isinstance(error_detail, list):
-                            error_message = f"API Error ({exc.response.status_code}): {json.dumps(error_detail)}"
-                        else:
-                            error_message = f"API Error ({exc.response.status_code}): {error_detail or exc.response.text}"
-                    except Exception:
-                        error_message = f"API Error ({exc.response.status_code}): {exc.response.text}"
-                self._update_status(f"Status: {error_message}", "red")
-            else:
-                self._update_status(f"Status: Unexpected Error - {exc}", "red")
+            self._handle_auth_error(exc)
+
+    def _finish_authentication(self, user_info):
+        user_display = user_info.get("name", user_info.get("username", "Unknown User"))
+        self._update_status(f"Status: Authenticated as {user_display} on SE Oasis.", "green")
+
+        if self.success_callback:
+            self.success_callback()
+
+    def _handle_auth_error(self, exc):
+        if isinstance(exc, ValueError):
+            self._update_status(f"Status: Error - {exc}", "red")
+        elif isinstance(exc, requests.exceptions.RequestException):
+            error_message = f"Network/API Error: {exc}"
+            if exc.response is not None:
+                try:
+                    error_detail = exc.response.json().get("detail", exc.response.text)
+                    if isinstance(error_detail, list):
+                        error_message = f"API Error ({exc.response.status_code}): {json.dumps(error_detail)}"
+                    else:
+                        error_message = f"API Error ({exc.response.status_code}): {error_detail or exc.response.text}"
+                except Exception:
+                    error_message = f"API Error ({exc.response.status_code}): {exc.response.text}"
+            self._update_status(f"Status: {error_message}", "red")
+        else:
+            self._update_status(f"Status: Unexpected Error - {exc}", "red")
+
+        self.auth_manager.clear_authentication()
 
-            self.auth_manager.clear_authentication()
+    @staticmethod
+    def _token_key(token):
+        return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+    def _cached_user_info(self):
+        """User info from a recent verification of the current token, or None."""
+        token = self.auth_manager.current_token
+        if not token:
+            return None
+        cached = _verified_tokens.get(self._token_key(token))
+        if cached and time.monotonic() - cached[0] < TOKEN_CACHE_TTL:
+            self.auth_manager.current_user_info = cached[1]
+            return cached[1]
+        return None
+
+    def _verify_and_cache(self, token):
+        """Verify a token against the API and remember the result.
+
+        Runs on _verify_pool, so it touches neither the manager state nor the UI.
+        """
+        user_info = self.auth_manager.verify_token(token, report=False)
+        if token:
+            now = time.monotonic()
+            # Drop expired entries so the cache stays small
+            for stale in [k for k, (ts, _) in list(_verified_tokens.items()) if now - ts >= TOKEN_CACHE_TTL]:
+                _verified_tokens.pop(stale, None)
+            _verified_tokens[self._token_key(token)] = (now, user_info)
+        return user_info
 
     def _update_status(self, message, color=None):
-        self.auth_status_label.value = message
-        self.auth_status_label.style.text_color = color if color else None
+        # Only write traits that actually change; each write is a frontend sync message
+        color = color if color else None
+        label = self.auth_status_label
+        if label.value != message:
+            label.value = message
+        if label.style.text_color != color:
+            label.style.text_color = color
 
     def _toggle_settings(self, _button):
         if self.settings_content.layout.display == "none":
@@ -28,9 +28,11 @@ def sort_by_date_desc(data_list):
         reverse=True
     )
 
-def create_batch_selection(url, token, load_data_function):
-    # Get batch IDs
-    batch_ids_list_tmp = list(get_batch_ids(url, token))
+def create_batch_selection(url, token, load_data_function, session=None, batch_ids=None):
+    # Get batch IDs (callers may pass a prefetched list)
+    if batch_ids is None:
+        batch_ids = get_batch_ids(url, token, session=session)
+    batch_ids_list_tmp = list(batch_ids)
     batch_ids_list = []
     for b in batch_ids_list_tmp:
         if "_".join(b.split("_")[:-1]) in batch_ids_list_tmp: